@@ -0,0 +1,311 @@
+"""
+Benchmarks the query-to-DataFrame path of QueryEngines offline.
+
+Fixture tables of every size and column mix are generated with DuckDB in a scratch
+directory and served to every engine of --engines by the stand-in drivers of
+stand_in_drivers.py, so that the production fetch and conversion code runs: DBAPI
+rows for starburst and livedb, Arrow record batches for bigquery. local runs the
+queries on the local backend instead, with DuckDB returning Arrow directly.
+Every stage is timed over --repeat runs:
+    param_substitution: reading the SQL file and replacing the params.
+    row_fetch: running the query and fetching the rows.
+    dataframe_conversion: building the DataFrame from the fetched rows.
+    dtype_compaction: compacting the dtypes of the DataFrame.
+    persist: saving the output as Parquet.
+    reload: loading the saved output with load_csv_file=True.
+    cache_store: storing the results in the result cache.
+    cache_hit: loading the query from the result cache.
+
+Usage:
+    python benchmark_query_engines.py --sizes 10000 1000000 50000000 --label main
+    python benchmark_query_engines.py --engines starburst --mixes numeric
+    python benchmark_query_engines.py --compare results/main.json results/branch.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCHMARK_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_PATH, "..", ".."))  # src/, for utils
+
+import duckdb  # noqa: E402
+import pandas as pd  # noqa: E402
+import pyarrow as pa  # noqa: E402
+import stand_in_drivers  # noqa: E402
+
+from utils.dtype_compaction import DtypeCompactor  # noqa: E402
+from utils.query_engines import QueryEngines  # noqa: E402
+
+ENGINES = ["starburst", "bigquery", "livedb", "local"]
+
+COLUMN_MIXES = {
+    "numeric": [
+        "i as id",
+        "i % 1000 as store_id",
+        "(i * 7919 % 100000) / 100.0 as amount",
+        "i % 2 = 0 as is_paid",
+    ],
+    "mixed": [
+        "i as id",
+        "(i * 7919 % 100000) / 100.0 as amount",
+        "'city_' || (i % 50) as city",
+        "timestamp '2024-01-01' + to_seconds(i) as created_at",
+        "md5(cast(i as varchar)) as user_hash",
+    ],
+    "strings": [
+        "i as id",
+        "'status_' || (i % 5) as status",
+        "'city_' || (i % 50) as city",
+        "md5(cast(i as varchar)) as user_hash",
+        "repeat('x', cast(i % 20 as integer)) as comment",
+    ],
+}
+
+STAGES = [
+    "param_substitution",
+    "row_fetch",
+    "dataframe_conversion",
+    "dtype_compaction",
+    "persist",
+    "reload",
+    "cache_store",
+    "cache_hit",
+]
+
+
+def generate_fixture(fixtures_path, mix, rows):
+    """
+    Writes a fixture table of rows rows with the columns of a mix, and returns its name.
+    """
+    table_name = f"{mix}_{rows}"
+    file_path = os.path.join(fixtures_path, f"bench.public.{table_name}.parquet")
+    columns = ", ".join(COLUMN_MIXES[mix])
+    duckdb.execute(
+        f"copy (select {columns} from range({rows}) t(i)) "
+        f"to '{file_path}' (format parquet, compression zstd)"
+    )
+
+    return table_name
+
+
+def last_log_entry(q):
+    with open(q.query_log.log_file, "r") as f:
+        return json.loads(f.readlines()[-1])
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def stage_seconds(entry, stages):
+    return sum(entry[f"{stage}_seconds"] or 0 for stage in stages)
+
+
+def run_once(q, engine, table_name):
+    """
+    Runs every stage once on a fixture table and returns the seconds of each stage.
+    """
+    params = {"table": table_name, "min_id": "0"}
+    seconds = {}
+    run_query = getattr(
+        q, "run_query_starburst" if engine == "local" else f"run_query_{engine}"
+    )
+
+    def query_seconds(entry):
+        return stage_seconds(
+            entry, ["prepare", "queue", "execution", "fetch", "conversion"]
+        )
+
+    df = run_query(
+        "benchmark.sql", params=params, use_cache=False, compact_dtypes=False
+    )
+    entry = last_log_entry(q)
+    seconds["param_substitution"] = entry["prepare_seconds"]
+    seconds["row_fetch"] = stage_seconds(entry, ["queue", "execution", "fetch"])
+    seconds["dataframe_conversion"] = entry["conversion_seconds"]
+
+    _, seconds["dtype_compaction"] = timed(lambda: DtypeCompactor().compact(df))
+
+    run_query(
+        "benchmark.sql",
+        params=params,
+        csv_file=table_name,
+        use_cache=False,
+        compact_dtypes=False,
+    )
+    entry = last_log_entry(q)
+    seconds["persist"] = entry["total_seconds"] - query_seconds(entry)
+
+    _, seconds["reload"] = timed(
+        lambda: run_query("benchmark.sql", csv_file=table_name, load_csv_file=True)
+    )
+
+    run_query("benchmark.sql", params=params, refresh_cache=True, compact_dtypes=False)
+    entry = last_log_entry(q)
+    seconds["cache_store"] = entry["total_seconds"] - query_seconds(entry)
+
+    _, seconds["cache_hit"] = timed(
+        lambda: run_query("benchmark.sql", params=params, compact_dtypes=False)
+    )
+
+    return seconds, df
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCHMARK_PATH,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(sizes, mixes, engines, repeat, label):
+    work_path = tempfile.mkdtemp(prefix="query_engines_benchmark_")
+    fixtures_path = os.path.join(work_path, "fixtures")
+    os.makedirs(fixtures_path)
+    stand_in_drivers.install(fixtures_path)
+    shutil.copytree(os.path.join(BENCHMARK_PATH, "sql"), os.path.join(work_path, "sql"))
+
+    cwd = os.getcwd()
+    os.chdir(work_path)  # QueryEngines reads sql/ and writes outputs under the cwd
+    os.environ["THOTH_SHARED_PATH"] = os.path.join(work_path, "shared")
+
+    results = []
+    try:
+        for mix in mixes:
+            for rows in sizes:
+                table_name = generate_fixture(fixtures_path, mix, rows)
+
+                for engine in engines:
+                    print(f"Benchmarking {engine}: {mix} x {rows:,} rows")
+                    with QueryEngines(
+                        backend="local" if engine == "local" else "warehouse",
+                        fixtures_path=fixtures_path,
+                        cache_max_bytes=100 * 1024**3,
+                    ) as q:
+                        runs = []
+                        for _ in range(repeat):
+                            seconds, df = run_once(q, engine, table_name)
+                            runs.append(seconds)
+                        memory_bytes = int(
+                            df.memory_usage(index=False, deep=True).sum()
+                        )
+                        n_columns = len(df.columns)
+                        del df
+
+                    for stage in STAGES:
+                        seconds = [run[stage] for run in runs]
+                        results.append(
+                            {
+                                "engine": engine,
+                                "mix": mix,
+                                "rows": rows,
+                                "columns": n_columns,
+                                "stage": stage,
+                                "runs": repeat,
+                                "seconds_min": min(seconds),
+                                "seconds_median": statistics.median(seconds),
+                                "rows_per_second": rows / max(min(seconds), 1e-9),
+                                "memory_bytes": memory_bytes,
+                            }
+                        )
+
+                os.remove(
+                    os.path.join(fixtures_path, f"bench.public.{table_name}.parquet")
+                )
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_path, ignore_errors=True)
+
+    return {
+        "label": label,
+        "git_commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "pyarrow": pa.__version__,
+        "duckdb": duckdb.__version__,
+        "results": results,
+    }
+
+
+def compare(base_file, head_file, threshold):
+    """
+    Prints the slowdown of every stage between two result files and returns the
+    number of stages slower than threshold (e.g. 1.2 for 20% slower).
+    """
+    with open(base_file, "r") as f:
+        base = pd.DataFrame(json.load(f)["results"])
+    with open(head_file, "r") as f:
+        head = pd.DataFrame(json.load(f)["results"])
+    for results in [base, head]:
+        if "engine" not in results:
+            results["engine"] = "local"  # Results from before --engines
+
+    df = base.merge(
+        head, on=["engine", "mix", "rows", "stage"], suffixes=("_base", "_head")
+    )
+    df["ratio"] = df["seconds_min_head"] / df["seconds_min_base"].clip(lower=1e-9)
+    df["regression"] = df["ratio"] > threshold
+
+    columns = ["engine", "mix", "rows", "stage", "seconds_min_base", "seconds_min_head"]
+    print(df[columns + ["ratio", "regression"]].to_string(index=False))
+
+    return int(df["regression"].sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument(
+        "--mixes", nargs="+", default=list(COLUMN_MIXES), choices=list(COLUMN_MIXES)
+    )
+    parser.add_argument("--engines", nargs="+", default=ENGINES, choices=ENGINES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--label", default=None)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"))
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(*args.compare, args.threshold)
+        print(f"{regressions} stages slower than x{args.threshold}")
+        sys.exit(1 if regressions else 0)
+
+    report = run_benchmark(
+        args.sizes, args.mixes, args.engines, args.repeat, args.label
+    )
+
+    output = args.output or os.path.join(
+        BENCHMARK_PATH,
+        "results",
+        f"{args.label or report['git_commit'] or 'benchmark'}.json",
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+select *
+from bench.public.{table}
+where id >= {min_id}
@@ -0,0 +1,221 @@
+"""
+Stand-in warehouse drivers for the benchmark, serving the fixture tables with DuckDB.
+
+install() registers them in sys.modules under the names QueryEngines imports (trino,
+mysql.connector, google.auth and google.cloud.bigquery), so that run_query_* on the
+warehouse backend goes through the production fetch and conversion code of every
+engine: DBAPI rows turned into a DataFrame with from_records for Starburst and
+LiveDB, and Arrow record batches for BigQuery. Only the warehouse is replaced.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+import types
+from datetime import datetime, timezone
+
+import duckdb
+
+BIGQUERY_PAGE_ROWS = 100_000  # Rows per Arrow record batch of the BigQuery stand-in
+
+
+class FixtureDatabase:
+    """
+    A class to run queries on the fixture tables, registered under their fully
+    qualified names (catalog.schema.table.parquet -> catalog.schema.table).
+    """
+
+    def __init__(self, fixtures_path):
+        self.fixtures_path = fixtures_path
+        self.__conn = duckdb.connect(":memory:")
+        self.__lock = threading.Lock()
+        self.__registered = set()
+
+    def __quote(self, identifier):
+        return '"' + identifier.replace('"', '""') + '"'
+
+    def __register_fixtures(self):
+        """
+        Registers the fixture tables written since the last query as views.
+        """
+        for file_name in sorted(os.listdir(self.fixtures_path)):
+            if not file_name.endswith(".parquet") or file_name in self.__registered:
+                continue
+
+            catalog, schema, table = file_name[: -len(".parquet")].split(".")
+            catalogs = {
+                row[0] for row in self.__conn.execute("show databases").fetchall()
+            }
+            if catalog not in catalogs:
+                self.__conn.execute(f"attach ':memory:' as {self.__quote(catalog)}")
+            self.__conn.execute(
+                f"create schema if not exists {self.__quote(catalog)}.{self.__quote(schema)}"
+            )
+            file_path = os.path.join(self.fixtures_path, file_name).replace("'", "''")
+            self.__conn.execute(
+                f"create or replace view {self.__quote(catalog)}.{self.__quote(schema)}."
+                f"{self.__quote(table)} as select * from read_parquet('{file_path}')"
+            )
+            self.__registered.add(file_name)
+
+    def cursor(self):
+        with self.__lock:
+            self.__register_fixtures()
+        return self.__conn.cursor()  # One DuckDB cursor per query, safe across threads
+
+
+class DBAPICursor:
+    """
+    A DBAPI cursor like the Trino and mysql-connector ones: rows are Python tuples.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self.description = None
+        self.stats = {}  # Trino query stats
+        self.__cursor = None
+
+    def execute(self, query):
+        if re.match(r"\s*set\s", query, re.IGNORECASE):
+            return  # Session settings of the LiveDB connection
+
+        start = time.perf_counter()
+        self.close()
+        self.__cursor = self.database.cursor()
+        self.__cursor.execute(query)
+        self.description = self.__cursor.description
+        self.stats = {
+            "queuedTimeMillis": 0,
+            "elapsedTimeMillis": (time.perf_counter() - start) * 1000,
+            "processedBytes": None,
+        }
+
+    def fetchall(self):
+        return self.__cursor.fetchall()
+
+    def fetchmany(self, size):
+        return self.__cursor.fetchmany(size)
+
+    def close(self):
+        if self.__cursor is not None:
+            self.__cursor.close()
+        self.__cursor = None
+
+
+class DBAPIConnection:
+    def __init__(self, database):
+        self.database = database
+
+    def cursor(self, buffered=None):
+        return DBAPICursor(self.database)
+
+    def ping(self):
+        pass
+
+    def shutdown(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class BigQueryRows:
+    """
+    A BigQuery RowIterator over the results of a query.
+    """
+
+    def __init__(self, table):
+        self.__table = table
+        self.total_rows = table.num_rows
+        self.schema = table.schema
+
+    def to_arrow_iterable(self, **read_options):
+        return iter(self.__table.to_batches(max_chunksize=BIGQUERY_PAGE_ROWS))
+
+
+class BigQueryJob:
+    def __init__(self, database, query):
+        self.database = database
+        self.query = query
+        self.created = datetime.now(timezone.utc)
+        self.started = None
+        self.ended = None
+        self.total_bytes_processed = None
+        self.total_bytes_billed = None
+
+    def result(self):
+        self.started = datetime.now(timezone.utc)
+        cursor = self.database.cursor()
+        try:
+            table = cursor.execute(self.query).fetch_arrow_table()
+        finally:
+            cursor.close()
+        self.ended = datetime.now(timezone.utc)
+
+        return BigQueryRows(table)
+
+
+class BigQueryClient:
+    def __init__(self, database):
+        self.database = database
+
+    def query(self, query):
+        return BigQueryJob(self.database, query)
+
+    def close(self):
+        pass
+
+
+class Credentials:
+    valid = True
+
+
+def module(name, **attributes):
+    stand_in = types.ModuleType(name)
+    stand_in.__dict__.update(attributes)
+    sys.modules[name] = stand_in
+
+    return stand_in
+
+
+def install(fixtures_path):
+    """
+    Registers the stand-in drivers, serving the tables of fixtures_path, in place of
+    the warehouse drivers for the rest of the process.
+    """
+    database = FixtureDatabase(fixtures_path)
+
+    trino_dbapi = module(
+        "trino.dbapi", connect=lambda **conn_details: DBAPIConnection(database)
+    )
+    trino_auth = module("trino.auth", OAuth2Authentication=lambda: None)
+    module("trino", dbapi=trino_dbapi, auth=trino_auth)
+
+    mysql_connector = module(
+        "mysql.connector", connect=lambda **conn_details: DBAPIConnection(database)
+    )
+    module("mysql", connector=mysql_connector)
+
+    exceptions = module(
+        "google.auth.exceptions",
+        DefaultCredentialsError=type("DefaultCredentialsError", (Exception,), {}),
+        RefreshError=type("RefreshError", (Exception,), {}),
+    )
+    requests = module("google.auth.transport.requests", Request=lambda: None)
+    transport = module("google.auth.transport", requests=requests)
+    auth = module(
+        "google.auth",
+        default=lambda: (Credentials(), None),
+        exceptions=exceptions,
+        transport=transport,
+    )
+    bigquery = module(
+        "google.cloud.bigquery", Client=lambda project=None: BigQueryClient(database)
+    )
+    bigquery_storage = module(
+        "google.cloud.bigquery_storage", BigQueryReadClient=lambda: None
+    )  # Read options are accepted and ignored
+    cloud = module("google.cloud", bigquery=bigquery, bigquery_storage=bigquery_storage)
+    module("google", auth=auth, cloud=cloud)
@@ -0,0 +1,113 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    """
+    A class to keep warm database connections and reuse them across queries.
+    """
+
+    def __init__(
+        self,
+        connect,
+        health_check=None,
+        max_size=4,
+        max_idle_seconds=10 * 60,
+        health_check_after_seconds=60,
+    ):
+        self.connect = connect  # Callable that opens a new connection
+        self.health_check = health_check  # Callable that raises on a dead connection
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self.health_check_after_seconds = health_check_after_seconds
+
+        self.__idle = []  # (connection, last_used) pairs, most recently used last
+        self.__lock = threading.Lock()
+        self.__slots = threading.BoundedSemaphore(max_size)
+
+    def __close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass  # The connection is discarded either way
+
+    def __is_healthy(self, conn, last_used):
+        if self.health_check is None:
+            return True
+        if time.time() - last_used < self.health_check_after_seconds:
+            return True  # Recently used connections are trusted without a round-trip
+
+        try:
+            self.health_check(conn)
+        except Exception:
+            return False
+
+        return True
+
+    def __acquire(self):
+        self.reap()
+
+        while True:
+            with self.__lock:
+                if not self.__idle:
+                    break
+                conn, last_used = self.__idle.pop()
+
+            if self.__is_healthy(conn, last_used):
+                return conn
+            self.__close(conn)
+
+        return self.connect()
+
+    def __release(self, conn):
+        with self.__lock:
+            self.__idle.append((conn, time.time()))
+
+    @contextmanager
+    def connection(self):
+        """
+        Yields a pooled connection and returns it to the pool afterwards.
+        Connections that raised while in use are closed instead of returned.
+        """
+        self.__slots.acquire()
+        try:
+            conn = self.__acquire()
+            try:
+                yield conn
+            except BaseException:  # Also covers abandoned generators
+                self.__close(conn)
+                raise
+            self.__release(conn)
+        finally:
+            self.__slots.release()
+
+    def reap(self):
+        """
+        Closes the connections that have been idle for longer than max_idle_seconds.
+        """
+        now = time.time()
+        with self.__lock:
+            expired = [
+                conn
+                for conn, last_used in self.__idle
+                if now - last_used > self.max_idle_seconds
+            ]
+            self.__idle = [
+                (conn, last_used)
+                for conn, last_used in self.__idle
+                if now - last_used <= self.max_idle_seconds
+            ]
+
+        for conn in expired:
+            self.__close(conn)
+
+    def close(self):
+        """
+        Closes every idle connection of the pool.
+        """
+        with self.__lock:
+            idle, self.__idle = self.__idle, []
+
+        for conn, _ in idle:
+            self.__close(conn)
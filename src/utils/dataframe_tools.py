@@ -1,25 +1,243 @@
+import re
+
+import matplotlib.colors as mcolors
+import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+from .downsampling import Downsampler
+from .pivot_cache import PivotCache
+from .schema_inference import SchemaInference
+from .sketches import DistinctCountSketch, QuantileSketch
+
+
+def parse_quantile(func):
+    """
+    Returns the quantile of a 'pXX' aggfunc (p90 -> 0.9, p99.9 -> 0.999), or None.
+    """
+    match = re.fullmatch(r"p(\d+(?:\.\d+)?)", str(func))
+    if match is None or float(match.group(1)) > 100:
+        return None
+    return float(match.group(1)) / 100
+
+
+class PivotPartial:
+    """
+    A class to hold the partial aggregates of a pivot per (index, *columns) group, so
+    that the pivots of chunks, or of workers in other processes, can be merged.
+    sum, min, max, the count of non-null values and the sums behind the mean, the
+    weighted mean and the ratio are kept exactly. The median and the pXX quantiles are
+    estimated with a QuantileSketch, within relative_error of the exact value, and
+    approx_nunique with a DistinctCountSketch. nunique cannot be merged exactly.
+    """
+
+    def __init__(
+        self,
+        index,
+        columns,
+        values,
+        aggfuncs,
+        weights=None,
+        denominator=None,
+        relative_error=0.01,
+    ):
+        if "nunique" in aggfuncs:
+            raise ValueError(
+                "nunique cannot be computed over chunks. Use approx_nunique instead."
+            )
+
+        self.index = index
+        self.columns = columns
+        self.values = values
+        self.aggfuncs = aggfuncs
+        self.weights = weights  # Column of the weights of weighted_mean
+        self.denominator = denominator  # Column of the denominator of ratio
+        self.relative_error = relative_error
+
+        self.stats = None  # One row per group and (value, stat) columns
+        self.quantile_sketches = {}  # Per value column, for median and pXX
+        self.distinct_sketches = {}  # Per value column, for approx_nunique
+
+    def __merge_stats(self, stats):
+        stats = [stat for stat in stats if stat is not None]
+        if len(stats) == 1:
+            return stats[0]
+
+        merged = pd.concat(stats)
+        merge_funcs = {
+            (value, stat): stat if stat in ["min", "max"] else "sum"
+            for value, stat in merged.columns
+        }
+
+        return merged.groupby(level=list(range(merged.index.nlevels)), sort=True).agg(
+            merge_funcs
+        )
+
+    def __merge_sketches(self, sketches, other_sketches):
+        merged = {}
+        for value in set(sketches) | set(other_sketches):
+            if value not in sketches or value not in other_sketches:
+                merged[value] = sketches.get(value) or other_sketches[value]
+            else:
+                merged[value] = sketches[value].merge(other_sketches[value])
+
+        return merged
+
+    def update(self, chunk, index_values):
+        """
+        Adds a chunk to the partial aggregates. index_values is the index column of the
+        chunk, once converted.
+        """
+        keys = [index_values] + [chunk[column] for column in self.columns]
+        stats = ["count"] + [func for func in ["min", "max"] if func in self.aggfuncs]
+        if {"sum", "mean", "ratio"} & set(self.aggfuncs):
+            stats.append("sum")
+
+        grouped = chunk.groupby(keys, sort=False, observed=True, dropna=True)[
+            self.values
+        ]
+        chunk_stats = grouped.agg(stats)
+
+        sums = {}
+        for value in self.values:
+            if "weighted_mean" in self.aggfuncs:
+                weights = chunk[self.weights].where(chunk[value].notna())
+                sums[(value, "weighted_sum")] = chunk[value] * weights
+                sums[(value, "weight")] = weights
+            if "ratio" in self.aggfuncs:
+                sums[(value, "denominator")] = chunk[self.denominator]
+        if sums:
+            chunk_stats = chunk_stats.join(
+                pd.DataFrame(sums)
+                .groupby(keys, sort=False, observed=True, dropna=True)
+                .sum()
+            )
+
+        self.stats = self.__merge_stats([self.stats, chunk_stats])
+
+        for value in self.values:
+            if any(
+                func == "median" or parse_quantile(func) is not None
+                for func in self.aggfuncs
+            ):
+                self.quantile_sketches.setdefault(
+                    value, QuantileSketch(self.relative_error)
+                ).update(keys, chunk[value])
+            if "approx_nunique" in self.aggfuncs:
+                self.distinct_sketches.setdefault(value, DistinctCountSketch()).update(
+                    keys, chunk[value]
+                )
+
+        return self
+
+    def merge(self, other):
+        """
+        Returns new partial aggregates with the groups of both.
+        """
+        merged = PivotPartial(
+            self.index,
+            self.columns,
+            self.values,
+            self.aggfuncs,
+            weights=self.weights,
+            denominator=self.denominator,
+            relative_error=self.relative_error,
+        )
+        merged.stats = self.__merge_stats([self.stats, other.stats])
+        merged.quantile_sketches = self.__merge_sketches(
+            self.quantile_sketches, other.quantile_sketches
+        )
+        merged.distinct_sketches = self.__merge_sketches(
+            self.distinct_sketches, other.distinct_sketches
+        )
+
+        return merged
+
+    def aggregate(self):
+        """
+        Returns one row per group and (value, aggfunc) columns, like a grouped agg.
+        """
+        stats = self.stats
+        aggregated = {}
+        for value in self.values:
+            for func in self.aggfuncs:
+                quantile = 0.5 if func == "median" else parse_quantile(func)
+                if quantile is not None:
+                    result = self.quantile_sketches[value].quantile(quantile)
+                elif func == "mean":
+                    count = stats[(value, "count")]
+                    result = stats[(value, "sum")] / count.where(count > 0)
+                elif func == "weighted_mean":
+                    weight = stats[(value, "weight")]
+                    result = stats[(value, "weighted_sum")] / weight.where(weight != 0)
+                elif func == "ratio":
+                    denominator = stats[(value, "denominator")]
+                    result = stats[(value, "sum")] / denominator.where(denominator != 0)
+                elif func == "approx_nunique":
+                    result = (
+                        self.distinct_sketches[value]
+                        .estimate()
+                        .reindex(stats.index, fill_value=0)
+                    )
+                else:
+                    result = stats[(value, func)]
+                aggregated[(value, func)] = result
+
+        return pd.DataFrame(aggregated, index=stats.index)
+
 
 class Pivot:
     """
     A class to pivot and aggregate a DataFrame.
+
+    aggfuncs can be 'sum', 'mean', 'median', 'min', 'max', 'count' (non-null values),
+    'nunique', 'approx_nunique' (HyperLogLog, mergeable over chunks), any quantile
+    as 'pXX' (e.g. 'p90'), 'weighted_mean' (weighted by the pivot_params["weights"]
+    column) and 'ratio' (sum of the value over the sum of the
+    pivot_params["denominator"] column).
+
+    df can also be an iterable of DataFrame chunks, e.g. from iter_query_*, or of
+    PivotPartial objects: the chunks are then aggregated one at a time into mergeable
+    partial aggregates, in memory bounded by the number of groups, with the median and
+    the quantiles estimated within pivot_params["relative_error"] (1% by default).
+
+    cache memoizes the pivots of DataFrames: True shares an in-memory LRU across the
+    Pivot objects of the process, and a PivotCache can also keep them on disk.
     """
 
-    def __init__(self, df, pivot_params):
+    __shared_cache = None  # Created on first use of cache=True
+
+    def __init__(self, df, pivot_params, cache=None):
         self.df = df
         self.index = pivot_params["index"]
         self.columns = pivot_params["columns"]
         self.values = pivot_params["values"]
         self.aggfuncs = pivot_params["aggfuncs"]
-
-    def __try_datetime_conversion(self, index):
-        try:
-            self.df[index] = pd.to_datetime(self.df[index])
-        except (ValueError, TypeError, KeyError):
-            pass
+        self.weights = pivot_params.get("weights")  # e.g. [5]
+        self.denominator = pivot_params.get("denominator")  # e.g. [6]
+        self.relative_error = pivot_params.get("relative_error", 0.01)
+        self.cache = self.__get_cache(cache)
+        self.schema_inference = SchemaInference()
+
+    def __get_cache(self, cache):
+        if cache is None or cache is False:
+            return None
+        if cache is True:
+            if Pivot.__shared_cache is None:
+                Pivot.__shared_cache = PivotCache()
+            return Pivot.__shared_cache
+        if not isinstance(cache, PivotCache):
+            raise ValueError("cache must be a boolean or a PivotCache.")
+        return cache
+
+    def __try_datetime_conversion(self, df, index, cache=True):
+        """
+        Returns the index column as datetimes when it holds datetimes, without writing
+        back to the caller's DataFrame. Parsed columns are cached across runs, except
+        for chunks, which are only read once.
+        """
+        return self.schema_inference.to_datetime(df[index], cache=cache)
 
     def __flatten_multi_index_columns(self, pivot_table):
         pivot_table.columns = [
@@ -28,13 +246,13 @@ class Pivot:
 
         return pivot_table
 
-    def __resolve_column_names(self, column_references):
+    def __resolve_column_names(self, df, column_references):
         resolved_columns = []
 
         for column_reference in column_references:
             if isinstance(column_reference, int):  # If it's an index
                 resolved_columns.append(
-                    self.df.columns[column_reference - 1]
+                    df.columns[column_reference - 1]
                 )  # Convert 1-based index to 0-based
             else:
                 resolved_columns.append(
@@ -43,43 +261,243 @@ class Pivot:
 
         return resolved_columns
 
-    def __validate_columns(self, columns):
-        missing_cols = [col for col in columns if col not in self.df.columns]
+    def __validate_columns(self, df, columns):
+        missing_cols = [col for col in columns if col not in df.columns]
         if missing_cols:
             raise ValueError(f"Columns {missing_cols} not found in the dataframe.")
 
     def __validate_aggfuncs(self):
+        valid_aggfuncs = [
+            "sum",
+            "mean",
+            "median",
+            "min",
+            "max",
+            "count",
+            "nunique",
+            "approx_nunique",
+            "weighted_mean",
+            "ratio",
+        ]
         for func in self.aggfuncs:
-            if func not in ["sum", "mean", "median", "min", "max"]:
+            if func not in valid_aggfuncs and parse_quantile(func) is None:
                 raise ValueError(
-                    f"Invalid aggregation function '{func}'. Valid options are: ['sum', 'mean', 'median', 'min', 'max']"
+                    f"Invalid aggregation function '{func}'. Valid options are: {valid_aggfuncs} and quantiles as 'pXX', e.g. 'p90'"
                 )
 
-    def run_pivot(self):
-        self.index = self.__resolve_column_names(self.index)
-        self.index = self.index[0]
-        self.columns = self.__resolve_column_names(self.columns)
-        self.values = self.__resolve_column_names(self.values)
+        if "weighted_mean" in self.aggfuncs and not self.weights:
+            raise ValueError("weighted_mean requires a weights column in pivot_params.")
+        if "ratio" in self.aggfuncs and not self.denominator:
+            raise ValueError("ratio requires a denominator column in pivot_params.")
+
+    def __resolve_pivot_params(self, df):
+        index = self.__resolve_column_names(df, self.index)[0]
+        columns = self.__resolve_column_names(df, self.columns)
+        values = self.__resolve_column_names(df, self.values)
+        weights = self.__resolve_column_names(df, self.weights or [None])[0]
+        denominator = self.__resolve_column_names(df, self.denominator or [None])[0]
+
+        self.__validate_columns(
+            df,
+            [index]
+            + columns
+            + values
+            + [column for column in [weights, denominator] if column is not None],
+        )
 
-        self.__validate_columns([self.index] + self.columns + self.values)
+        return index, columns, values, weights, denominator
 
-        self.__validate_aggfuncs()
+    def __aggregate(self, index_values, columns, values, weights, denominator):
+        """
+        Aggregates every value column with every aggfunc in grouped passes over
+        (index, *columns): the built-in aggfuncs share a single pass, the quantiles one
+        pass each, and the weighted mean and the ratio one pass over their sums.
+        Group keys are sorted, and categorical keys only produce the combinations that
+        appear in the data. Returns one row per group and (value, aggfunc) columns.
+        """
+        keys = [index_values] + [self.df[column] for column in columns]
+        grouped = self.df.groupby(keys, sort=True, observed=True, dropna=True)
+
+        builtin_aggfuncs = [
+            func
+            for func in self.aggfuncs
+            if func in ["sum", "mean", "median", "min", "max", "count", "nunique"]
+        ]
+        results = {}
+        if builtin_aggfuncs:
+            builtin = grouped[values].agg(builtin_aggfuncs)
+            results.update({column: builtin[column] for column in builtin.columns})
+
+        sums = {}
+        for value in values:
+            if "weighted_mean" in self.aggfuncs:
+                value_weights = self.df[weights].where(self.df[value].notna())
+                sums[(value, "weighted_sum")] = self.df[value] * value_weights
+                sums[(value, "weight")] = value_weights
+            if "ratio" in self.aggfuncs:
+                sums[(value, "sum")] = self.df[value]
+        if "ratio" in self.aggfuncs:
+            sums[(denominator, "denominator")] = self.df[denominator]
+        if sums:
+            sums = (
+                pd.DataFrame(sums)
+                .groupby(keys, sort=True, observed=True, dropna=True)
+                .sum()
+            )
+
+        for func in self.aggfuncs:
+            quantile = parse_quantile(func)
+            if quantile is not None:
+                quantiles = grouped[values].quantile(quantile)
+                results.update({(value, func): quantiles[value] for value in values})
+            elif func == "weighted_mean":
+                for value in values:
+                    weight = sums[(value, "weight")]
+                    results[(value, func)] = sums[
+                        (value, "weighted_sum")
+                    ] / weight.where(weight != 0)
+            elif func == "ratio":
+                total = sums[(denominator, "denominator")]
+                for value in values:
+                    results[(value, func)] = sums[(value, "sum")] / total.where(
+                        total != 0
+                    )
+            elif func == "approx_nunique":
+                for value in values:
+                    results[(value, func)] = (
+                        DistinctCountSketch().update(keys, self.df[value]).estimate()
+                    )
+
+        group_index = grouped.size().index
+        return pd.DataFrame(
+            {
+                (value, func): results[(value, func)].reindex(
+                    group_index, fill_value=0 if func == "approx_nunique" else np.nan
+                )
+                for value in values
+                for func in self.aggfuncs
+            },
+            index=group_index,
+        )
+
+    def __reshape(self, aggregated, columns, values):
+        """
+        Moves the columns keys from the rows to the columns and orders the columns as
+        (aggfunc, value, *columns), like pd.pivot_table.
+        """
+        aggregated = aggregated.dropna(how="all")  # Groups where every value is null
+        if columns:
+            aggregated = aggregated.unstack(columns)
+
+        n_levels = aggregated.columns.nlevels
+        aggregated.columns = aggregated.columns.reorder_levels(
+            [1, 0] + list(range(2, n_levels))
+        )
+        aggregated = aggregated.reindex(
+            columns=self.aggfuncs, level=0
+        )  # Stable: keeps the value and columns order within every aggfunc
+        aggregated = aggregated.reindex(columns=values, level=1)
 
-        self.__try_datetime_conversion(self.index)
+        return aggregated.dropna(how="all", axis=1)
+
+    def run_partial(self):
+        """
+        Aggregates the chunks of df into mergeable partial aggregates. Partials of
+        different workers can be combined with PivotPartial.merge, or pivoted together
+        with Pivot(partials, pivot_params).run_pivot().
+        """
+        self.__validate_aggfuncs()
 
-        pivot_table = pd.pivot_table(
-            self.df,
-            values=self.values,
-            index=self.index,
-            columns=self.columns,
-            aggfunc=self.aggfuncs,
+        chunks = (
+            [self.df] if isinstance(self.df, (pd.DataFrame, PivotPartial)) else self.df
         )
 
+        partial = None
+        for chunk in chunks:
+            if not isinstance(chunk, PivotPartial):
+                (
+                    index,
+                    columns,
+                    values,
+                    weights,
+                    denominator,
+                ) = self.__resolve_pivot_params(chunk)
+                chunk = PivotPartial(
+                    index,
+                    columns,
+                    values,
+                    self.aggfuncs,
+                    weights=weights,
+                    denominator=denominator,
+                    relative_error=self.relative_error,
+                ).update(
+                    chunk, self.__try_datetime_conversion(chunk, index, cache=False)
+                )
+            partial = chunk if partial is None else partial.merge(chunk)
+
+        if partial is None:
+            raise ValueError("There are no chunks to pivot.")
+
+        return partial
+
+    def run_pivot(self):
+        """
+        Returns the pivot table of the values by index and columns, with one column per
+        aggfunc, value and columns combination named agg__value__column.
+        The caller's DataFrame is neither modified nor copied.
+        """
+        cache_key = None  # Only DataFrames are memoized, chunks are read once
+
+        if not isinstance(self.df, pd.DataFrame):
+            partial = self.run_partial()
+            pivot_table = self.__reshape(
+                partial.aggregate(), partial.columns, partial.values
+            )
+        else:
+            index, columns, values, weights, denominator = self.__resolve_pivot_params(
+                self.df
+            )
+
+            self.__validate_aggfuncs()
+
+            if self.cache is not None:
+                used_columns = [index] + columns + values
+                used_columns += [
+                    column
+                    for column in [weights, denominator]
+                    if column is not None and column not in used_columns
+                ]
+                cache_key = self.cache.build_key(
+                    self.df,
+                    used_columns,
+                    {
+                        "index": index,
+                        "columns": columns,
+                        "values": values,
+                        "aggfuncs": self.aggfuncs,
+                        "weights": weights,
+                        "denominator": denominator,
+                        "relative_error": self.relative_error,
+                    },
+                )
+                df_pivoted = self.cache.get(cache_key)
+                if df_pivoted is not None:
+                    return df_pivoted
+
+            index_values = self.__try_datetime_conversion(self.df, index)
+
+            aggregated = self.__aggregate(
+                index_values, columns, values, weights, denominator
+            )
+
+            pivot_table = self.__reshape(aggregated, columns, values)
+
         df_pivoted = self.__flatten_multi_index_columns(pivot_table)
 
         df_pivoted.reset_index(inplace=True)
 
-        df_pivoted.sort_values(by=self.index, inplace=True)
+        if cache_key is not None:
+            self.cache.put(cache_key, df_pivoted)
 
         return df_pivoted
 
@@ -91,6 +509,7 @@ class Plotter:
 
     def __init__(self, df, plot_params=None, figure_params=None):
         self.df = df
+        self.schema_inference = SchemaInference()
 
         # --------------------------------#
         # - Plot parameters               #
@@ -176,11 +595,32 @@ class Plotter:
             "scatterplot",
             "histogram",
             "histogram_accumulated",
+            "density_scatterplot",
         ]
         if plot_type not in valid_plot_types:
             raise ValueError(
-                f"Invalid plot type '{plot}'. Valid options are: {valid_plot_types}"
+                f"Invalid plot type '{plot_type}'. Valid options are: {valid_plot_types}"
+            )
+
+    def __validate_downsample(self, downsample, downsample_threshold):
+        valid_downsample = ["auto", "minmax", "lttb", None]
+        if downsample not in valid_downsample:
+            raise ValueError(
+                f"Invalid downsample '{downsample}'. Valid options are: {valid_downsample}"
             )
+        if not isinstance(downsample_threshold, int) or downsample_threshold <= 0:
+            raise ValueError("downsample_threshold must be an int greater than 0.")
+
+    def __get_grid_size(self, grid_size):
+        if not isinstance(grid_size, int):
+            raise ValueError("grid_size must be an int.")
+        if grid_size <= 1:
+            raise ValueError("grid_size must be greater than 1.")
+        return grid_size
+
+    def __validate_log_scale(self, log_scale):
+        if not isinstance(log_scale, bool):
+            raise ValueError("log_scale must be a boolean.")
 
     def __validate_legend(self, legend):
         if not isinstance(legend, bool):
@@ -257,6 +697,16 @@ class Plotter:
         bins = config.get("bins", None)
         bins = self.__get_bins(bins)
 
+        downsample = config.get("downsample", "auto")
+        downsample_threshold = config.get("downsample_threshold", 100_000)
+        self.__validate_downsample(downsample, downsample_threshold)
+
+        grid_size = config.get("grid_size", 300)
+        grid_size = self.__get_grid_size(grid_size)
+
+        log_scale = config.get("log_scale", False)
+        self.__validate_log_scale(log_scale)
+
         unpacked_config_dict = {
             "plot_type": plot_type,
             "x_column": x_column,
@@ -265,15 +715,20 @@ class Plotter:
             "styles": styles,
             "legend": legend,
             "bins": bins,
+            "downsample": downsample,
+            "downsample_threshold": downsample_threshold,
+            "grid_size": grid_size,
+            "log_scale": log_scale,
         }
 
         return unpacked_config_dict
 
-    def __try_datetime_conversion(self, column):
-        try:
-            self.df[column] = pd.to_datetime(self.df[column])
-        except (ValueError, TypeError, KeyError):
-            pass
+    def __try_datetime_conversion(self, x_column):
+        """
+        Returns the x column as datetimes when it holds datetimes, without writing back
+        to the caller's DataFrame. Parsed columns are cached across plots.
+        """
+        return self.schema_inference.to_datetime(self.df[x_column[0]])
 
     def __set_limits(self, ax, i):
         if self.x_limits is not None:
@@ -333,22 +788,47 @@ class Plotter:
 
         return fig, axs
 
+    def __downsample_lines(self, unpacked_config, x_values, ax):
+        """
+        Returns the (x, y) of every y column, downsampled to about the pixel width of
+        the axes when downsample is 'minmax' or 'lttb', or when it is 'auto' and the
+        lines have more than downsample_threshold points.
+        """
+        y_values = self.df[unpacked_config["y_columns"]]
+        method = unpacked_config["downsample"]
+        if method == "auto":
+            method = (
+                "minmax"
+                if len(x_values) > unpacked_config["downsample_threshold"]
+                else None
+            )
+
+        if method is None:
+            return [(x_values, y_values.iloc[:, i]) for i in range(y_values.shape[1])]
+
+        n_points = max(int(ax.get_window_extent().width), 3)  # Pixels of the axes
+
+        return Downsampler(method).downsample(x_values, y_values, n_points)
+
     def multiple_variable_lineplot(self, unpacked_config, ax):
         """
         Creates a line plot for multiple y variables against an x variable.
         If the x_column is a pd.datetime, then the x-axis will not be too crowded.
+        Lines with many points are downsampled, see downsample in plot_params.
         """
 
-        self.__try_datetime_conversion(unpacked_config["x_column"])
+        x_values = self.__try_datetime_conversion(unpacked_config["x_column"])
+        lines = self.__downsample_lines(unpacked_config, x_values, ax)
 
-        for y_column, color, style in zip(
+        for (line_x, line_y), y_column, color, style in zip(
+            lines,
             unpacked_config["y_columns"],
             unpacked_config["colors"],
             unpacked_config["styles"],
         ):
             ax.plot(
-                self.df[unpacked_config["x_column"]],
-                self.df[y_column],
+                line_x,
+                line_y,
                 color=color,
                 linestyle=style,
                 label=y_column,
@@ -375,6 +855,89 @@ class Plotter:
         if unpacked_config["legend"]:
             ax.legend(loc="best")
 
+    def __density_counts(self, x, y, grid_size):
+        """
+        Counts the points of every y column in a grid_size x grid_size grid shared by
+        all the columns, with a single bincount over every column at once.
+        Returns the counts (column, y bin, x bin) and the extent of the grid.
+        """
+        finite = np.isfinite(y) & np.isfinite(x)[:, None]
+        if not finite.any():
+            raise ValueError("There are no points to plot.")
+
+        x_min, x_max = x[finite.any(axis=1)].min(), x[finite.any(axis=1)].max()
+        y_min, y_max = y[finite].min(), y[finite].max()
+        x_span = x_max - x_min or 1.0
+        y_span = y_max - y_min or 1.0
+
+        with np.errstate(invalid="ignore"):
+            x_bins = np.clip(((x - x_min) / x_span * grid_size), 0, grid_size - 1)
+            y_bins = np.clip(((y - y_min) / y_span * grid_size), 0, grid_size - 1)
+        x_bins = np.nan_to_num(x_bins).astype(np.int64)
+        y_bins = np.nan_to_num(y_bins).astype(np.int64)
+
+        n_cells = grid_size * grid_size
+        cells = (
+            np.arange(y.shape[1]) * n_cells + y_bins * grid_size + x_bins[:, None]
+        )  # Flat index of the (column, y bin, x bin) of every point
+        counts = np.bincount(cells[finite], minlength=y.shape[1] * n_cells)
+
+        return counts.reshape(y.shape[1], grid_size, grid_size), [
+            x_min,
+            x_min + x_span,
+            y_min,
+            y_min + y_span,
+        ]
+
+    def multiple_variable_density_scatterplot(self, unpacked_config, ax):
+        """
+        Creates a density scatter plot for multiple y variables against an x variable:
+        points are counted in a grid and drawn as one image per y column, shaded from
+        transparent to the column's color, so that millions of points render quickly
+        and dense areas stay readable. log_scale shades the counts logarithmically.
+        """
+
+        x_values = self.__try_datetime_conversion(unpacked_config["x_column"])
+        is_datetime = pd.api.types.is_datetime64_any_dtype(x_values.dtype)
+        if is_datetime:
+            x = mdates.date2num(x_values.to_numpy(dtype="datetime64[ns]"))
+        else:
+            x = x_values.to_numpy(dtype=np.float64, na_value=np.nan)
+        y = self.df[unpacked_config["y_columns"]].to_numpy(
+            dtype=np.float64, na_value=np.nan
+        )
+
+        counts, extent = self.__density_counts(x, y, unpacked_config["grid_size"])
+
+        for column_counts, y_column, color in zip(
+            counts, unpacked_config["y_columns"], unpacked_config["colors"]
+        ):
+            cmap = mcolors.LinearSegmentedColormap.from_list(
+                f"density_{y_column}", [(*mcolors.to_rgb(color), 0.0), color]
+            )
+            cmap.set_bad(alpha=0.0)  # Empty cells stay transparent
+            norm = (
+                mcolors.LogNorm(vmin=1, vmax=max(column_counts.max(), 1))
+                if unpacked_config["log_scale"]
+                else mcolors.Normalize(vmin=0, vmax=max(column_counts.max(), 1))
+            )
+            ax.imshow(
+                np.ma.masked_equal(column_counts, 0),
+                extent=extent,
+                origin="lower",
+                aspect="auto",
+                interpolation="nearest",
+                cmap=cmap,
+                norm=norm,
+            )
+            ax.scatter([], [], color=color, label=y_column)  # Legend entry
+
+        if is_datetime:
+            ax.xaxis_date()
+
+        if unpacked_config["legend"]:
+            ax.legend(loc="best")
+
     def multiple_variable_histogram(self, unpacked_config, ax):
         """
         Creates normalized histograms for the specified columns.
@@ -443,3 +1006,6 @@ class Plotter:
 
             if unpacked_config["plot_type"] == "histogram_accumulated":
                 self.multiple_variable_histogram_accumulated(unpacked_config, axs[idx])
+
+            if unpacked_config["plot_type"] == "density_scatterplot":
+                self.multiple_variable_density_scatterplot(unpacked_config, axs[idx])
@@ -0,0 +1,138 @@
+import numpy as np
+from pandas.api import types
+
+
+class Downsampler:
+    """
+    A class to reduce the series of a line plot to about one point per pixel while
+    keeping their shape, so that rendering time no longer grows with the rows.
+
+    'minmax' keeps the lowest and the highest point of every bucket of x, so every
+    peak and trough stays visible. 'lttb' (Largest-Triangle-Three-Buckets) keeps the
+    point of every bucket that forms the largest triangle with its neighbours, which
+    is smoother but slower. Every method works on all the y columns at once.
+    """
+
+    def __init__(self, method="minmax"):
+        if method not in ["minmax", "lttb"]:
+            raise ValueError(
+                f"Invalid downsampling method '{method}'. Valid options are: ['minmax', 'lttb']"
+            )
+        self.method = method
+
+    def __x_positions(self, x_values):
+        """
+        Returns x as floats to bucket on: numbers and datetimes as they are, anything
+        else (e.g. strings) by row position.
+        """
+        if types.is_datetime64_any_dtype(x_values.dtype):
+            return x_values.to_numpy(dtype="datetime64[ns]").astype(np.float64)
+        if types.is_numeric_dtype(x_values.dtype) and not types.is_bool_dtype(
+            x_values.dtype
+        ):
+            return x_values.to_numpy(dtype=np.float64, na_value=np.nan)
+        return np.arange(len(x_values), dtype=np.float64)
+
+    def __buckets(self, x, n_buckets):
+        """
+        Returns the bucket of every row, with buckets of equal width in x.
+        """
+        x_min, x_max = x[0], x[-1]
+        if x_max == x_min:
+            return np.zeros(len(x), dtype=np.int64)
+
+        buckets = ((x - x_min) / (x_max - x_min) * n_buckets).astype(np.int64)
+        return np.minimum(buckets, n_buckets - 1)
+
+    def __min_max(self, x, y, n_buckets):
+        """
+        Returns, for every y column, the rows of the lowest and highest value of
+        every bucket, in x order. A bucket where the column is all NaN keeps its first
+        row, which is NaN, so that the line still breaks over the gap.
+        """
+        n_rows = len(x)
+        buckets = self.__buckets(x, n_buckets)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        bucket_of_row = np.repeat(
+            np.arange(len(starts)), np.diff(np.r_[starts, n_rows])
+        )
+        rows = np.arange(n_rows)[:, None]
+
+        positions = []
+        for reduce in [np.fmin, np.fmax]:  # NaNs are skipped
+            extremes = reduce.reduceat(y, starts, axis=0)
+            is_extreme = y == extremes[bucket_of_row]
+            positions.append(
+                np.minimum.reduceat(np.where(is_extreme, rows, n_rows), starts, axis=0)
+            )
+        positions = np.stack(positions, axis=1)
+        positions = np.where(
+            positions == n_rows, starts[:, None, None], positions
+        )  # All NaN buckets
+        positions = np.sort(positions, axis=1)  # Per bucket, in order
+
+        selected = []
+        for column in range(y.shape[1]):
+            column_positions = positions[:, :, column].ravel()
+            selected.append(np.unique(column_positions))  # Min and max can be one row
+
+        return selected
+
+    def __lttb(self, x, y, n_points):
+        """
+        Returns, for every y column, n_points rows picked with Largest-Triangle-Three-
+        Buckets: the first and the last rows, and one row per bucket in between.
+        """
+        n_rows, n_columns = y.shape
+        y = np.where(
+            np.isnan(y), np.nanmean(y, axis=0), y
+        )  # NaNs cannot win a triangle
+        edges = np.linspace(1, n_rows - 1, n_points - 1).astype(np.int64)
+
+        selected = np.zeros((n_points, n_columns), dtype=np.int64)
+        selected[-1] = n_rows - 1
+        columns = np.arange(n_columns)
+        for bucket in range(n_points - 2):
+            start, end = edges[bucket], max(edges[bucket + 1], edges[bucket] + 1)
+            next_end = max(edges[min(bucket + 2, n_points - 2)], end + 1)
+            next_x = x[end:next_end].mean()
+            next_y = y[end:next_end].mean(axis=0)
+
+            previous = selected[bucket]
+            previous_x = x[previous]
+            previous_y = y[previous, columns]
+            areas = np.abs(
+                (previous_x - next_x) * (y[start:end] - previous_y)
+                - (previous_x - x[start:end, None]) * (next_y - previous_y)
+            )
+            selected[bucket + 1] = start + np.argmax(areas, axis=0)
+
+        return [selected[:, column] for column in columns]
+
+    def downsample(self, x_values, y_values, n_points):
+        """
+        Returns the downsampled x and y of every column of y_values, as a list of
+        (x, y) Series: n_points buckets of up to two points with 'minmax', and
+        n_points points with 'lttb'. x_values is sorted first if needed, and rows with
+        a null x are dropped, since they are not drawn.
+        """
+        keep = x_values.notna().to_numpy()
+        x_values, y_values = x_values[keep], y_values[keep]
+        if not x_values.is_monotonic_increasing:
+            order = np.argsort(x_values.to_numpy(), kind="stable")
+            x_values, y_values = x_values.iloc[order], y_values.iloc[order]
+
+        if len(x_values) <= n_points or len(x_values) < 3:
+            return [(x_values, y_values.iloc[:, i]) for i in range(y_values.shape[1])]
+
+        x = self.__x_positions(x_values)
+        y = y_values.to_numpy(dtype=np.float64, na_value=np.nan)
+        if self.method == "minmax":
+            selected = self.__min_max(x, y, n_points)
+        else:
+            selected = self.__lttb(x, y, max(n_points, 3))
+
+        return [
+            (x_values.iloc[rows], y_values.iloc[rows, i])
+            for i, rows in enumerate(selected)
+        ]
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+from pandas.api import types
+
+from .schema_inference import SchemaInference
+
+
+class DtypeCompactor:
+    """
+    A class to cut the memory of query results by giving every column its most compact
+    lossless dtype: booleans instead of objects, and datetimes parsed once with a
+    detected format.
+
+    Three conversions change the results of later operations and are off by default:
+    downcast_integers stores integers, and floats holding integers and NULLs, in the
+    smallest (nullable) integer type holding every value, but arithmetic then
+    overflows (int8 100 * 100 wraps to 16), downcast_floats stores floats as float32
+    when it holds every value exactly, but sums and means of float32 columns drift
+    from the float64 results, and categorize turns strings with at most
+    category_max_unique distinct values (and at most category_max_ratio of the rows)
+    into categoricals, but grouping by categoricals yields every combination of
+    categories unless observed=True.
+    """
+
+    def __init__(
+        self,
+        category_max_ratio=0.01,
+        sample_size=10_000,
+        downcast_floats=False,
+        categorize=False,
+        category_max_unique=1_000,
+        downcast_integers=False,
+    ):
+        self.category_max_ratio = category_max_ratio  # Unique values per row
+        self.sample_size = sample_size  # Rows inspected before converting a column
+        self.downcast_integers = downcast_integers
+        self.downcast_floats = downcast_floats
+        self.categorize = categorize
+        self.category_max_unique = category_max_unique
+        self.schema_inference = SchemaInference(sample_size)
+
+    def options(self):
+        """
+        Returns the settings that change the compacted dtypes.
+        """
+        return {
+            "category_max_ratio": self.category_max_ratio,
+            "sample_size": self.sample_size,
+            "downcast_integers": self.downcast_integers,
+            "downcast_floats": self.downcast_floats,
+            "categorize": self.categorize,
+            "category_max_unique": self.category_max_unique,
+        }
+
+    def __sample(self, series):
+        non_null = series.dropna()
+        if len(non_null) > self.sample_size:
+            return non_null.sample(self.sample_size, random_state=0)
+        return non_null
+
+    def __compact_integer(self, series):
+        if not self.downcast_integers:
+            return series
+        return pd.to_numeric(series, downcast="integer")
+
+    def __compact_float(self, series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        missing = np.isnan(values)
+        finite = values[~missing]
+        if missing.any() and len(finite) > 0:
+            if (
+                np.array_equal(finite, np.round(finite))
+                and np.abs(finite).max() < 2**53
+            ):
+                return self.__compact_integer(
+                    series.astype("Int64")
+                )  # Integer column with NULLs, which pandas turned into floats
+
+        if not self.downcast_floats:
+            return series
+
+        compact = values.astype(np.float32)
+        if np.array_equal(compact.astype(np.float64), values, equal_nan=True):
+            return pd.Series(compact, index=series.index, name=series.name)
+
+        return series
+
+    def __compact_object(self, series):
+        sample = self.__sample(series)
+        if sample.empty:
+            return series
+
+        if sample.map(type).isin([bool, np.bool_]).all():
+            try:
+                return series.astype("boolean")
+            except (TypeError, ValueError):
+                return series
+
+        parsed = self.schema_inference.to_datetime(series, cache=False)
+        if parsed is not series:
+            return parsed
+
+        if not self.categorize or not sample.map(type).eq(str).all():
+            return series
+
+        if sample.nunique() > self.category_max_unique:
+            return series  # High cardinality, e.g. IDs
+
+        if series.nunique() > min(
+            self.category_max_unique, self.category_max_ratio * len(series)
+        ):
+            return series
+
+        return series.astype("category")
+
+    def compact_column(self, series):
+        """
+        Returns the column with its most compact lossless dtype.
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return series
+        if types.is_bool_dtype(series.dtype):
+            return series
+        if types.is_integer_dtype(series.dtype):
+            return self.__compact_integer(series)
+        if types.is_float_dtype(series.dtype):
+            return self.__compact_float(series)
+        if types.is_object_dtype(series.dtype) or types.is_string_dtype(series.dtype):
+            return self.__compact_object(series)
+
+        return series
+
+    def compact(self, df):
+        """
+        Returns a copy of the DataFrame with compact dtypes, and the bytes it saved.
+        """
+        compact_columns = {}
+        bytes_saved = 0
+
+        for column in df.columns:
+            series = df[column]
+            compact = self.compact_column(series)
+            if compact is series:
+                continue
+
+            bytes_before = series.memory_usage(index=False, deep=True)
+            bytes_after = compact.memory_usage(index=False, deep=True)
+            if bytes_after < bytes_before:
+                compact_columns[column] = compact
+                bytes_saved += bytes_before - bytes_after
+
+        if not compact_columns:
+            return df, 0
+
+        compact_df = df.copy(deep=False)
+        for column, compact in compact_columns.items():
+            compact_df[column] = compact
+
+        return compact_df, bytes_saved
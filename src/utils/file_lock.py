@@ -0,0 +1,105 @@
+import os
+import threading
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+def temporary_path(file_path):
+    """
+    Returns a temporary path next to file_path, unique to the calling process and thread,
+    to write to before an atomic os.replace.
+    """
+    return f"{file_path}.{os.getpid()}-{threading.get_ident()}.tmp"
+
+
+class FileLock:
+    """
+    A class to hold an exclusive lock on a file across the threads and processes of a host.
+    """
+
+    __thread_locks = {}  # One lock per path, since OS locks are per process on Windows
+    __thread_locks_lock = threading.Lock()
+
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+        self.__file = None
+
+        with FileLock.__thread_locks_lock:
+            self.__thread_lock = FileLock.__thread_locks.setdefault(
+                os.path.abspath(lock_path), threading.Lock()
+            )
+
+        lock_directory = os.path.dirname(lock_path)
+        if lock_directory and not os.path.exists(lock_directory):
+            os.makedirs(lock_directory, exist_ok=True)
+
+    def __lock_file(self, blocking):
+        if os.name == "nt":
+            mode = msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK
+            while True:
+                try:
+                    msvcrt.locking(self.__file.fileno(), mode, 1)
+                    return True
+                except OSError:
+                    if not blocking:
+                        return False  # LK_LOCK gives up after 10 seconds, so retry
+
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(self.__file.fileno(), flags)
+        except BlockingIOError:
+            return False
+
+        return True
+
+    def __unlock_file(self):
+        if os.name == "nt":
+            self.__file.seek(0)
+            msvcrt.locking(self.__file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self.__file.fileno(), fcntl.LOCK_UN)
+
+    def acquire(self, blocking=True):
+        """
+        Acquires the lock. Returns False if blocking is False and the lock is held.
+        """
+        if not self.__thread_lock.acquire(blocking):
+            return False
+
+        try:
+            self.__file = open(self.lock_path, "a+")
+            self.__file.seek(0)  # msvcrt locks bytes from the current position
+            if self.__lock_file(blocking):
+                return True
+            self.__file.close()
+            self.__file = None
+        except BaseException:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+            self.__thread_lock.release()
+            raise
+
+        self.__thread_lock.release()
+        return False
+
+    def release(self):
+        """
+        Releases the lock.
+        """
+        try:
+            self.__unlock_file()
+        finally:
+            self.__file.close()
+            self.__file = None
+            self.__thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
@@ -0,0 +1,170 @@
+import os
+import re
+import threading
+import time
+
+import pyarrow as pa
+
+
+class LocalEngine:
+    """
+    A class to run SQL locally with DuckDB over Parquet and CSV files, either to query
+    saved outputs without a warehouse round-trip or as a stand-in for the warehouse
+    that serves fixture tables under their fully qualified names.
+    """
+
+    def __init__(self):
+        import duckdb
+
+        self.__conn = duckdb.connect(":memory:")
+        self.__lock = threading.Lock()  # Serializes catalog changes
+        self.tables = {}  # Registered table name -> file path
+
+    def __quote(self, identifier):
+        return '"' + identifier.replace('"', '""') + '"'
+
+    def __scan(self, path):
+        path = path.replace("'", "''")
+        if os.path.isdir(path):
+            pattern = os.path.join(path, "*.parquet")
+            return (
+                f"read_parquet('{pattern}', union_by_name = true)"  # Chunks can differ
+            )
+        if path.endswith(".csv"):
+            return f"read_csv_auto('{path}')"
+        return f"read_parquet('{path}')"
+
+    def __translate(self, query, dialect):
+        """
+        Translates a warehouse query to DuckDB with sqlglot when it is installed, or
+        only rewrites backticked names (`project.dataset.table`) into quoted parts.
+        """
+        if dialect is not None:
+            try:
+                import sqlglot
+            except ImportError:
+                pass  # Most analytical SQL runs unchanged on DuckDB
+            else:
+                return ";\n".join(
+                    sqlglot.transpile(query, read=dialect, write="duckdb")
+                )
+
+        return re.sub(
+            r"`([^`]+)`",
+            lambda match: ".".join(
+                self.__quote(part) for part in match.group(1).split(".")
+            ),
+            query,
+        )
+
+    def register(self, table_name, path):
+        """
+        Registers a Parquet file, a directory of Parquet files or a CSV as a view.
+        Names with dots (catalog.schema.table or schema.table) are created in their
+        own catalog and schema, so warehouse queries find them under the same name.
+        """
+        parts = table_name.split(".")
+        if len(parts) > 3:
+            raise ValueError(
+                f"Invalid table name '{table_name}'. Use table, schema.table or catalog.schema.table."
+            )
+
+        with self.__lock:
+            if len(parts) == 3:
+                catalogs = {
+                    row[0] for row in self.__conn.execute("show databases").fetchall()
+                }
+                if parts[0] not in catalogs:
+                    self.__conn.execute(
+                        f"attach ':memory:' as {self.__quote(parts[0])}"
+                    )
+            if len(parts) >= 2:
+                schema = ".".join(self.__quote(part) for part in parts[:-1])
+                self.__conn.execute(f"create schema if not exists {schema}")
+
+            view = ".".join(self.__quote(part) for part in parts)
+            self.__conn.execute(
+                f"create or replace view {view} as select * from {self.__scan(path)}"
+            )
+            self.tables[table_name] = path
+
+    def register_directory(self, directory_path, table_name=None):
+        """
+        Registers every Parquet and CSV file and every directory of Parquet files in a
+        directory, named after the file without its extensions. table_name maps a
+        file name to a different table name. When several share a name, a Parquet file
+        wins over a directory, which wins over a CSV.
+        """
+        table_name = table_name or (lambda name: name)
+        registered = {}
+
+        for entry in sorted(
+            os.listdir(directory_path),
+            key=lambda entry: (
+                entry.endswith(".csv"),
+                os.path.isdir(os.path.join(directory_path, entry)),
+                entry,
+            ),
+        ):
+            path = os.path.join(directory_path, entry)
+            if os.path.isdir(path):
+                if not any(name.endswith(".parquet") for name in os.listdir(path)):
+                    continue
+                name = entry
+            elif entry.endswith(".parquet"):
+                name = entry[: -len(".parquet")]
+            elif entry.endswith(".csv"):
+                name = entry[: -len(".csv")]
+            else:
+                continue
+
+            name = table_name(name)
+            if name is None or name in registered:
+                continue  # Listed after the Parquet file of the same output
+            registered[name] = path
+
+        for name, path in registered.items():
+            self.register(name, path)
+
+        return registered
+
+    def query(self, query, dialect=None, stats=None):
+        """
+        Runs a query and returns its results as a DataFrame. dialect ('trino',
+        'bigquery' or 'mysql') is the SQL dialect the query was written in.
+        stats gets the execution_seconds and conversion_seconds of the query.
+        """
+        start = time.perf_counter()
+        cursor = self.__conn.cursor()  # One connection per call, safe across threads
+        try:
+            table = cursor.execute(self.__translate(query, dialect)).fetch_arrow_table()
+        finally:
+            cursor.close()
+
+        fetched = time.perf_counter()
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        if stats is not None:
+            stats["execution_seconds"] = fetched - start
+            stats["conversion_seconds"] = time.perf_counter() - fetched
+
+        return df
+
+    def iter_query(self, query, chunk_size, dialect=None):
+        """
+        Runs a query and yields its results in DataFrames of chunk_size rows.
+        """
+        cursor = self.__conn.cursor()
+        try:
+            reader = cursor.execute(
+                self.__translate(query, dialect)
+            ).fetch_record_batch(chunk_size)
+            for batch in reader:
+                yield pa.Table.from_batches([batch]).to_pandas(split_blocks=True)
+        finally:
+            cursor.close()
+
+    def close(self):
+        """
+        Closes the DuckDB database.
+        """
+        self.__conn.close()
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+class PivotCache:
+    """
+    A class to memoize pivot tables, keyed on a fingerprint of the pivoted columns and
+    the pivot_params, so that re-running a cell or a plotting loop on unchanged data
+    returns the previous pivot instead of aggregating again.
+
+    Pivots are kept in an in-memory LRU of max_entries, and also on disk under
+    cache_path when it is set, where they outlive the kernel and can be shared by
+    several notebooks.
+    """
+
+    def __init__(
+        self, max_entries=32, cache_path=None, ttl=None, max_bytes=512 * 1024**2
+    ):
+        self.max_entries = max_entries
+        self.__entries = OrderedDict()  # Key -> pivot, least recently used first
+        self.__lock = threading.Lock()
+        self.__disk = None
+        if cache_path is not None:
+            from .result_cache import ResultCache  # Needs pyarrow
+
+            self.__disk = ResultCache(cache_path, ttl=ttl, max_bytes=max_bytes)
+
+    def __fingerprint_column(self, series):
+        """
+        Hashes the values and the dtype of a column in one vectorized pass.
+        """
+        hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+        digest = hashlib.sha256(hashes.tobytes())
+        digest.update(f"{series.name}\n{series.dtype}".encode("utf-8"))
+
+        return digest.hexdigest()
+
+    def build_key(self, df, columns, params):
+        """
+        Returns the cache key of a pivot of the given columns of a DataFrame.
+        params are the normalized pivot_params, with column names instead of positions.
+        """
+        fingerprint = {
+            "shape": list(df.shape),
+            "columns": [self.__fingerprint_column(df[column]) for column in columns],
+            "params": params,
+        }
+
+        return hashlib.sha256(
+            json.dumps(fingerprint, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, key):
+        """
+        Returns a copy of the cached pivot, or None if it is missing.
+        """
+        with self.__lock:
+            df = self.__entries.get(key)
+            if df is not None:
+                self.__entries.move_to_end(key)
+                return df.copy()
+
+        if self.__disk is None:
+            return None
+
+        df = self.__disk.get(key)
+        if df is not None:
+            self.__put_memory(key, df)
+            return df.copy()
+
+        return None
+
+    def __put_memory(self, key, df):
+        with self.__lock:
+            self.__entries[key] = df
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+
+    def put(self, key, df):
+        """
+        Stores a copy of a pivot, so that later changes to df do not reach the cache.
+        """
+        df = df.copy()
+        self.__put_memory(key, df)
+
+        if self.__disk is not None:
+            self.__disk.put(key, df)
+
+    def clear(self):
+        """
+        Removes every pivot from memory and from disk.
+        """
+        with self.__lock:
+            self.__entries.clear()
+
+        if self.__disk is not None:
+            self.__disk.clear()
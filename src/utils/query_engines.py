@@ -1,10 +1,24 @@
+import hashlib
+import json
 import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-import mysql.connector
 import pandas as pd
-import trino
+import pyarrow as pa
+import pyarrow.parquet as pq
 from dotenv import load_dotenv
-from google.cloud import bigquery
+
+from .connection_pool import ConnectionPool
+from .dtype_compaction import DtypeCompactor
+from .file_lock import FileLock, temporary_path
+from .local_engine import LocalEngine
+from .query_log import QueryLog
+from .result_cache import ResultCache
+from .table_profiles import TableProfileCache
 
 
 class QueryEngines:
@@ -12,7 +26,22 @@ class QueryEngines:
     A class to manage SQL queries and interactions with databases.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        cache_ttl=24 * 60 * 60,
+        cache_max_bytes=2 * 1024**3,
+        pool_size=4,
+        pool_idle_seconds=10 * 60,
+        livedb_pool_size=2,
+        livedb_timeout_seconds=60,
+        max_bytes_per_query=None,
+        max_bytes_per_session=None,
+        budget_action="warn",
+        estimate_cost=False,
+        compact_min_rows=100_000,
+        backend="warehouse",
+        fixtures_path=None,
+    ):
         load_dotenv()
         self.credentials = {
             "starbust_host": os.getenv("STARBUST_HOST"),
@@ -27,11 +56,83 @@ class QueryEngines:
         self.sql_path = os.path.join(os.getcwd(), "sql")
         self.query_log_path = os.path.join(os.getcwd(), "query_log")
         self.output_path = os.path.join(os.getcwd(), "query_outputs")
+        self.shared_path = os.getenv(
+            "THOTH_SHARED_PATH", os.path.join(os.path.expanduser("~"), ".thoth")
+        )  # Shared by every project on the machine
+        self.cache_path = os.path.join(self.shared_path, "query_cache")
 
         self.__ensure_directory_exists(self.sql_path)
         self.__ensure_directory_exists(self.query_log_path)
         self.__ensure_directory_exists(self.output_path)
-        self.__authenticate_bigquery()
+        self.query_log = QueryLog(self.query_log_path)
+        self.cache = ResultCache(
+            self.cache_path, ttl=cache_ttl, max_bytes=cache_max_bytes
+        )
+        self.table_profiles = TableProfileCache(
+            os.path.join(self.shared_path, "table_profiles")
+        )
+
+        self.__trino_auth = None  # Keeps the OAuth2 token cache across connections
+        self.__trino_pool = ConnectionPool(
+            self.__connect_trino,
+            health_check=self.__health_check_trino,
+            max_size=pool_size,
+            max_idle_seconds=pool_idle_seconds,
+        )
+        self.__bigquery_client = None
+        self.__bqstorage_client = None
+        self.__livedb_timeout_seconds = livedb_timeout_seconds
+        self.__livedb_pool = ConnectionPool(
+            self.__connect_livedb,
+            health_check=self.__health_check_livedb,
+            max_size=livedb_pool_size,
+            max_idle_seconds=pool_idle_seconds,
+        )
+        self.__clients_lock = threading.Lock()
+
+        if budget_action not in ["warn", "block"]:
+            raise ValueError(
+                f"Invalid budget_action '{budget_action}'. Valid options are: ['warn', 'block']"
+            )
+        self.max_bytes_per_query = max_bytes_per_query
+        self.max_bytes_per_session = max_bytes_per_session
+        self.budget_action = budget_action
+        self.estimate_cost = estimate_cost  # Dry-run every query even without a budget
+        self.session_bytes = 0  # Bytes processed by the queries of this instance
+        self.__session_lock = threading.Lock()
+
+        self.dtype_compactor = DtypeCompactor()
+        self.compact_min_rows = compact_min_rows  # Results compacted by default
+
+        if backend not in ["warehouse", "local"]:
+            raise ValueError(
+                f"Invalid backend '{backend}'. Valid options are: ['warehouse', 'local']"
+            )
+        self.backend = backend  # 'local' serves every engine from fixture tables
+        self.fixtures_path = fixtures_path or os.path.join(os.getcwd(), "fixtures")
+        self.__local_engine = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Closes the pooled connections and clients of every engine.
+        """
+        self.__trino_pool.close()
+        self.__livedb_pool.close()
+
+        with self.__clients_lock:
+            if self.__bigquery_client is not None:
+                self.__bigquery_client.close()
+            self.__bigquery_client = None
+            self.__bqstorage_client = None
+            if self.__local_engine is not None:
+                self.__local_engine.close()
+            self.__local_engine = None
 
     def __ensure_directory_exists(self, directory_path):
         if not os.path.exists(directory_path):
@@ -41,27 +142,115 @@ class QueryEngines:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"The file {file_path} does not exist.")
 
-    def __replace_params(self):
-        if self.params:
-            for key, value in self.params.items():
-                self.read_query = self.read_query.replace(f"{{{key}}}", value)
-        return self.read_query
+    def __replace_params(self, query, params):
+        if params:
+            for key, value in params.items():
+                query = query.replace(f"{{{key}}}", value)
+        return query
 
     def __prepare_query(self, query_file, params=None):
-        self.query_file = query_file
-        self.params = params
+        with open(os.path.join(self.sql_path, query_file), "r") as f:
+            query = f.read()
+
+        query_replaced = self.__replace_params(query, params)
+
+        return query_replaced
+
+    def __log_query(self, log_entry, start):
+        log_entry["total_seconds"] = time.perf_counter() - start
+        self.query_log.append(log_entry)
+
+        with self.__session_lock:
+            self.session_bytes += log_entry["bytes_processed"] or 0
+
+    def __estimate_trino(self, query_replaced):
+        plan = self.__query_data_trino(
+            f"explain (type io, format json) {query_replaced}"
+        ).iloc[0, 0]
+        plan = json.loads(plan)
 
-        with open(os.path.join(self.sql_path, self.query_file), "r") as f:
-            self.read_query = f.read()
+        bytes_estimate = 0
+        for table in plan.get("inputTableColumnInfos", []):
+            try:
+                table_bytes = float(table["estimate"]["outputSizeInBytes"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if table_bytes == table_bytes:  # Trino reports unknown sizes as NaN
+                bytes_estimate += table_bytes
 
-        self.read_query = self.__replace_params()
+        return int(bytes_estimate), plan
 
-        return self.read_query
+    def __estimate_bigquery(self, query_replaced):
+        from google.cloud import bigquery
 
-    def __log_query(self, query):
-        log_file = os.path.join(self.query_log_path, "log.sql")
-        with open(log_file, "w") as f:
-            f.write(query)
+        clint = self.__get_bigquery_client()
+        job_config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False)
+        query_job = clint.query(query_replaced, job_config=job_config)
+
+        plan = {
+            "statement_type": query_job.statement_type,
+            "referenced_tables": [
+                table.to_api_repr() for table in query_job.referenced_tables
+            ],
+        }
+
+        return query_job.total_bytes_processed, plan
+
+    def __estimate_query(self, engine, query_replaced):
+        self.__validate_engine(engine)
+        if self.backend == "local":
+            raise ValueError("Cost estimation is not available with backend='local'.")
+        if engine == "starburst":
+            bytes_estimate, plan = self.__estimate_trino(query_replaced)
+        elif engine == "bigquery":
+            bytes_estimate, plan = self.__estimate_bigquery(query_replaced)
+        else:
+            raise ValueError(
+                "Cost estimation is only available for ['starburst', 'bigquery']"
+            )
+
+        return {"engine": engine, "bytes_estimate": bytes_estimate, "plan": plan}
+
+    def __check_budget(self, engine, query_replaced, log_entry):
+        """
+        Estimates the bytes a query will scan and warns or blocks, depending on
+        budget_action, when it exceeds max_bytes_per_query or max_bytes_per_session.
+        """
+        has_budget = (
+            self.max_bytes_per_query is not None
+            or self.max_bytes_per_session is not None
+        )
+        if engine in ["livedb", "local"] or not (has_budget or self.estimate_cost):
+            return
+        if self.backend == "local":
+            return  # Fixture tables cost nothing to scan
+
+        bytes_estimate = self.__estimate_query(engine, query_replaced)["bytes_estimate"]
+        log_entry["bytes_estimate"] = bytes_estimate
+
+        messages = []
+        if (
+            self.max_bytes_per_query is not None
+            and bytes_estimate > self.max_bytes_per_query
+        ):
+            messages.append(
+                f"the query would scan {bytes_estimate / 1e9:.2f} GB, over the "
+                f"{self.max_bytes_per_query / 1e9:.2f} GB per query budget"
+            )
+        if (
+            self.max_bytes_per_session is not None
+            and self.session_bytes + bytes_estimate > self.max_bytes_per_session
+        ):
+            messages.append(
+                f"the session would reach {(self.session_bytes + bytes_estimate) / 1e9:.2f} GB, "
+                f"over the {self.max_bytes_per_session / 1e9:.2f} GB per session budget"
+            )
+
+        if not messages:
+            return
+        if self.budget_action == "block":
+            raise ValueError(f"Query blocked: {'; '.join(messages)}.")
+        print(f"Warning: {'; '.join(messages)}.")
 
     def __get_conn_details_starburst(self):
         conn_details = {
@@ -69,73 +258,1676 @@ class QueryEngines:
             "port": self.credentials["starbust_port"],
             "user": self.credentials["starbust_user"],
             "http_scheme": "https",
-            "auth": trino.auth.OAuth2Authentication(),
+            "auth": self.__trino_auth,
         }
 
         return conn_details
 
-    def __query_data_trino(self, query_replaced):
-        conn_details = self.__get_conn_details_starburst()
-        with trino.dbapi.connect(**conn_details) as conn:
-            df = pd.read_sql(query_replaced, conn)
+    def __connect_trino(self):
+        import trino  # Deferred until Starburst is first used
+
+        with self.__clients_lock:
+            if self.__trino_auth is None:
+                self.__trino_auth = trino.auth.OAuth2Authentication()
+
+        return trino.dbapi.connect(**self.__get_conn_details_starburst())
+
+    def __health_check_trino(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("select 1")
+        cursor.fetchall()
+
+    def __update_stats_trino(self, cursor, stats, wall_seconds):
+        trino_stats = cursor.stats or {}
+        queue_seconds = trino_stats.get("queuedTimeMillis", 0) / 1000
+        elapsed_seconds = trino_stats.get("elapsedTimeMillis", 0) / 1000
+
+        stats["queue_seconds"] = queue_seconds
+        stats["execution_seconds"] = max(elapsed_seconds - queue_seconds, 0)
+        stats["fetch_seconds"] = max(wall_seconds - elapsed_seconds, 0)
+        stats["bytes_processed"] = trino_stats.get("processedBytes")
+
+    def __deduplicate_columns(self, columns):
+        """
+        Renames repeated column names (e.g. select o.id, s.id) to id, id_2, ... since
+        Parquet outputs and the result cache need unique names.
+        """
+        seen = set(columns)
+        counts = {}
+        deduplicated = []
+        for column in columns:
+            counts[column] = counts.get(column, 0) + 1
+            if counts[column] == 1:
+                deduplicated.append(column)
+                continue
+
+            suffix = counts[column]
+            while f"{column}_{suffix}" in seen:
+                suffix += 1
+            deduplicated.append(f"{column}_{suffix}")
+            seen.add(f"{column}_{suffix}")
+
+        return deduplicated
+
+    def __query_data_trino(self, query_replaced, stats=None):
+        stats = {} if stats is None else stats
+
+        with self.__trino_pool.connection() as conn:
+            cursor = conn.cursor()
+            start = time.perf_counter()
+            cursor.execute(query_replaced)
+            rows = cursor.fetchall()
+            self.__update_stats_trino(cursor, stats, time.perf_counter() - start)
+            columns = self.__deduplicate_columns(
+                [column[0] for column in cursor.description]
+            )
+
+        start = time.perf_counter()
+        df = pd.DataFrame.from_records(rows, columns=columns)
+        stats["conversion_seconds"] = time.perf_counter() - start
+
+        return df
+
+    def __iter_data_trino(self, query_replaced, chunk_size, stats=None):
+        stats = {} if stats is None else stats
+
+        with self.__trino_pool.connection() as conn:
+            cursor = conn.cursor()
+            start = time.perf_counter()
+            cursor.execute(query_replaced)
+            columns = self.__deduplicate_columns(
+                [column[0] for column in cursor.description]
+            )
+
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield pd.DataFrame.from_records(rows, columns=columns)
+
+            self.__update_stats_trino(cursor, stats, time.perf_counter() - start)
+
+    def __get_bigquery_client(self):
+        """
+        Returns the shared BigQuery client, which is thread-safe and reused across queries.
+        Authentication and the client import are deferred until BigQuery is first used.
+        """
+        with self.__clients_lock:
+            if self.__bigquery_client is None:
+                from google.cloud import bigquery
+
+                self.__authenticate_bigquery()
+                self.__bigquery_client = bigquery.Client(project="dhub-glovo")
+
+        return self.__bigquery_client
+
+    def __get_bqstorage_client(self):
+        """
+        Returns a BigQuery Storage API client, or None to fall back to paged REST reads.
+        """
+        try:
+            from google.cloud import bigquery_storage
+        except ImportError:
+            return None
+
+        with self.__clients_lock:
+            if self.__bqstorage_client is None:
+                self.__bqstorage_client = bigquery_storage.BigQueryReadClient()
+
+        return self.__bqstorage_client
+
+    def __get_read_options_bigquery(self, max_stream_count, bounded_memory):
+        read_options = {"bqstorage_client": self.__get_bqstorage_client()}
+        if bounded_memory:
+            read_options["max_stream_count"] = 1  # A single stream and page in flight
+            read_options["max_queue_size"] = 1
+        elif max_stream_count is not None:
+            read_options["max_stream_count"] = max_stream_count
+
+        return read_options
+
+    def __update_stats_bigquery(self, query_job, stats):
+        if query_job.started is not None and query_job.created is not None:
+            stats["queue_seconds"] = (
+                query_job.started - query_job.created
+            ).total_seconds()
+        if query_job.ended is not None and query_job.started is not None:
+            stats["execution_seconds"] = (
+                query_job.ended - query_job.started
+            ).total_seconds()
+        stats["bytes_processed"] = query_job.total_bytes_processed
+        stats["bytes_billed"] = query_job.total_bytes_billed
+
+    def __query_data_bigquery(
+        self,
+        query_replaced,
+        progress_callback=None,
+        max_stream_count=None,
+        bounded_memory=False,
+        stats=None,
+    ):
+        stats = {} if stats is None else stats
+        clint = self.__get_bigquery_client()
+
+        query_job = clint.query(query_replaced)
+        rows = query_job.result()
+        self.__update_stats_bigquery(query_job, stats)
+
+        read_options = self.__get_read_options_bigquery(
+            max_stream_count, bounded_memory
+        )
+
+        start = time.perf_counter()
+        batches = []
+        n_rows = 0
+        for batch in rows.to_arrow_iterable(**read_options):
+            batches.append(batch)
+            n_rows += batch.num_rows
+            if progress_callback is not None:
+                progress_callback(n_rows, rows.total_rows)
+
+        stats["fetch_seconds"] = time.perf_counter() - start
+
+        if not batches:
+            return pd.DataFrame(columns=[field.name for field in rows.schema])
+
+        start = time.perf_counter()
+        table = pa.Table.from_batches(batches)
+        del batches  # Let to_pandas release each Arrow buffer once it is converted
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        stats["conversion_seconds"] = time.perf_counter() - start
 
         return df
 
-    def __query_data_bigquery(self, query_replaced):
-        clint = bigquery.Client(project="dhub-glovo")
+    def __iter_data_bigquery(
+        self,
+        query_replaced,
+        chunk_size,
+        max_stream_count=None,
+        bounded_memory=True,
+        stats=None,
+    ):
+        stats = {} if stats is None else stats
+        clint = self.__get_bigquery_client()
 
         query_job = clint.query(query_replaced)
         rows = query_job.result()
-        df = pd.DataFrame([dict(row) for row in rows])
+        self.__update_stats_bigquery(query_job, stats)
+
+        read_options = self.__get_read_options_bigquery(
+            max_stream_count, bounded_memory
+        )
+
+        buffer = []
+        n_buffered = 0
+        for batch in rows.to_arrow_iterable(**read_options):
+            buffer.append(batch)
+            n_buffered += batch.num_rows
+
+            while n_buffered >= chunk_size:  # Re-slice pages into fixed-size chunks
+                table = pa.Table.from_batches(buffer)
+                yield table.slice(0, chunk_size).to_pandas()
+                buffer = table.slice(chunk_size).to_batches()
+                n_buffered -= chunk_size
+
+        if n_buffered > 0:
+            yield pa.Table.from_batches(buffer).to_pandas()
+
+    def __connect_livedb(self):
+        import mysql.connector  # Deferred until LiveDB is first used
+
+        conn = mysql.connector.connect(
+            host=self.credentials["livedb_host"],
+            port=int(self.credentials["livedb_port"] or 3306),
+            user=self.credentials["livedb_user"],
+            password=self.credentials["livedb_pw"],
+            database=self.credentials["livedb_database"],
+            autocommit=True,  # No transaction, and no snapshot, outlives a statement
+        )
+
+        cursor = conn.cursor()
+        cursor.execute(
+            f"set session max_execution_time = {int(self.__livedb_timeout_seconds * 1000)}"
+        )  # Statement timeout for selects
+        cursor.execute("set session transaction read only")
+        cursor.execute("set session transaction isolation level read committed")
+        cursor.close()
+
+        return conn
+
+    def __health_check_livedb(self, conn):
+        conn.ping()
+
+    def __iter_data_livedb(self, query_replaced, chunk_size, stats=None):
+        """
+        Streams the rows of an unbuffered cursor. When the caller stops early, closing
+        the cursor would raise on the unread rows, so the connection is shut down
+        instead and the pool discards it.
+        """
+        stats = {} if stats is None else stats
+        stats["fetch_seconds"] = 0
+        stats["conversion_seconds"] = 0
+
+        with self.__livedb_pool.connection() as conn:
+            cursor = conn.cursor(buffered=False)  # Stream rows instead of buffering
+            start = time.perf_counter()
+            cursor.execute(query_replaced)
+            stats["execution_seconds"] = time.perf_counter() - start
+            columns = self.__deduplicate_columns(
+                [column[0] for column in cursor.description]
+            )
+
+            exhausted = False
+            try:
+                while True:
+                    start = time.perf_counter()
+                    rows = cursor.fetchmany(chunk_size)
+                    stats["fetch_seconds"] += time.perf_counter() - start
+                    if not rows:
+                        exhausted = True
+                        break
+
+                    start = time.perf_counter()
+                    df = pd.DataFrame.from_records(rows, columns=columns)
+                    stats["conversion_seconds"] += time.perf_counter() - start
+                    yield df
+            finally:
+                if exhausted:
+                    cursor.close()
+                else:
+                    conn.shutdown()  # Closes the socket without reading the rows left
+
+    def __query_data_livedb(self, query_replaced, chunk_size=10_000, stats=None):
+        stats = {} if stats is None else stats
+
+        dfs = list(self.__iter_data_livedb(query_replaced, chunk_size, stats))
+        if not dfs:
+            return pd.DataFrame()
+
+        start = time.perf_counter()
+        df = pd.concat(dfs, ignore_index=True)
+        stats["conversion_seconds"] += time.perf_counter() - start
+
+        return df
+
+    def __get_local_engine(self):
+        with self.__clients_lock:
+            if self.__local_engine is None:
+                local_engine = LocalEngine()
+                if self.backend == "local":
+                    if not os.path.isdir(self.fixtures_path):
+                        raise FileNotFoundError(
+                            f"The fixtures directory {self.fixtures_path} does not exist."
+                        )
+                    local_engine.register_directory(self.fixtures_path)
+                self.__local_engine = local_engine
+        return self.__local_engine
+
+    def __output_table_name(self, file_name):
+        if file_name == "incremental":
+            return None  # Windows of incremental queries, not an output
+        return re.sub(r"\W", "_", file_name.replace(".sql", ""))
+
+    def __prepare_local_engine(self, engine):
+        """
+        Returns the local engine and the SQL dialect of the query. Queries on the
+        'local' engine see every saved output as a table named after its csv_file,
+        without the .sql extension.
+        """
+        local_engine = self.__get_local_engine()
+        if engine == "local":
+            local_engine.register_directory(
+                self.output_path, table_name=self.__output_table_name
+            )  # Outputs saved since the last query are picked up
+
+        dialects = {"starburst": "trino", "bigquery": "bigquery", "livedb": "mysql"}
+
+        return local_engine, dialects.get(engine)
+
+    def __query_data_local(self, engine, query_replaced, stats=None):
+        local_engine, dialect = self.__prepare_local_engine(engine)
+
+        df = local_engine.query(query_replaced, dialect, stats=stats)
+        df.columns = self.__deduplicate_columns(list(df.columns))
 
         return df
 
+    def __iter_data_local(self, engine, query_replaced, chunk_size, stats=None):
+        local_engine, dialect = self.__prepare_local_engine(engine)
+
+        start = time.perf_counter()
+        for df in local_engine.iter_query(query_replaced, chunk_size, dialect):
+            df.columns = self.__deduplicate_columns(list(df.columns))
+            yield df
+        if stats is not None:
+            stats["execution_seconds"] = time.perf_counter() - start
+
+    def __output_file_path(self, file_name, file_format):
+        return os.path.join(self.output_path, f"{file_name}.{file_format}")
+
+    def __save_to_parquet(self, df, file_name):
+        file_path = self.__output_file_path(file_name, "parquet")
+        print(file_path)
+        temporary_file = temporary_path(file_path)
+        df.to_parquet(temporary_file, index=False, compression="zstd")
+        os.replace(temporary_file, file_path)  # Readers never see a partial file
+        self.__remove_spilled_output(file_name)
+
+    def __remove_spilled_output(self, file_name):
+        spill_path = self.__output_dataset_path(file_name)
+        if os.path.isdir(spill_path):
+            shutil.rmtree(spill_path)  # Chunks spilled by an older iter_query_*
+
     def __save_to_csv(self, df, file_name):
-        file_path = os.path.join(self.output_path, f"{file_name}.csv")
+        file_path = self.__output_file_path(file_name, "csv")
         print(file_path)
-        df.to_csv(file_path, index=False)
+        temporary_file = temporary_path(file_path)
+        df.to_csv(temporary_file, index=False)
+        os.replace(temporary_file, file_path)  # Readers never see a partial file
 
-    def __load_from_csv(self, csv_file):
-        file_path = os.path.join(self.output_path, f"{csv_file}.csv")
-        df = pd.read_csv(file_path)
+    def __output_dataset_path(self, file_name):
+        return os.path.join(self.output_path, file_name)
+
+    def __load_from_parquet(self, file_path, columns=None):
+        if os.path.isdir(file_path):
+            table = self.__read_parquet_dataset(file_path, columns)
+        else:
+            table = pq.read_table(file_path, columns=columns, memory_map=True)
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
 
         return df
 
-    def run_query_starburst(
-        self, query_file, params=None, csv_file=None, load_csv_file=False
-    ):
+    def __read_parquet_dataset(self, directory_path, columns=None):
+        """
+        Reads a directory of Parquet chunks whose schemas can differ: every chunk is
+        written with the types pandas inferred for it, e.g. null for a column that is
+        empty in one chunk, or int64 and double for a nullable integer. The schemas are
+        unified to the widest type of every column before reading.
+        """
+        file_paths = sorted(
+            os.path.join(directory_path, name)
+            for name in os.listdir(directory_path)
+            if name.endswith(".parquet")
+        )
+        if not file_paths:
+            return pa.table({})  # The query returned no rows
+
+        schema = pa.unify_schemas(
+            [pq.read_schema(file_path) for file_path in file_paths],
+            promote_options="permissive",
+        )
+
+        return pa.concat_tables(
+            [
+                pq.read_table(file_path, columns=columns, memory_map=True).cast(
+                    schema
+                    if columns is None
+                    else pa.schema([schema.field(column) for column in columns])
+                )
+                for file_path in file_paths
+            ]
+        )
+
+    def __load_from_csv(self, csv_file, columns=None):
+        file_path = self.__output_file_path(csv_file, "csv")
+        df = pd.read_csv(file_path, usecols=columns)
+
+        return df
+
+    def __save_output(self, df, file_name, export_csv):
+        if file_name is None:
+            return  # Without csv_file the results are only cached
+
+        self.__save_to_parquet(df, file_name)  # Save the query results to Parquet
+
+        if export_csv:
+            self.__save_to_csv(df, file_name)  # Save the query results to a CSV file
+
+    def __load_output(self, file_name, columns=None):
+        """
+        Loads a saved output: a Parquet file, a directory of Parquet chunks spilled by
+        iter_query_*, or a CSV for outputs saved before Parquet. Saving either of the
+        first two removes the other, and the local engine picks them in the same order.
+        """
+        if os.path.exists(self.__output_file_path(file_name, "parquet")):
+            return self.__load_from_parquet(
+                self.__output_file_path(file_name, "parquet"), columns
+            )
+
+        if os.path.isdir(self.__output_dataset_path(file_name)):
+            return self.__load_from_parquet(
+                self.__output_dataset_path(file_name), columns
+            )
+
+        self.__ensure_file_exists(
+            self.__output_file_path(file_name, "csv")
+        )  # Check if the file exists
+
+        return self.__load_from_csv(file_name, columns)
+
+    def __compact_dtypes(self, df, compact_dtypes, log_entry=None):
+        """
+        Compacts the dtypes of query results, by default when they have at least
+        compact_min_rows rows, and reports the memory saved.
+        """
+        if compact_dtypes is None:
+            compact_dtypes = len(df) >= self.compact_min_rows
+        if not compact_dtypes:
+            return df
+
+        start = time.perf_counter()
+        df, bytes_saved = self.dtype_compactor.compact(df)
+        if bytes_saved > 0:
+            print(f"Compacted dtypes: saved {bytes_saved / 1024**2:,.1f} MiB")
+
+        if log_entry is not None:
+            log_entry["memory_saved_bytes"] = int(bytes_saved)
+            log_entry["conversion_seconds"] = (log_entry["conversion_seconds"] or 0) + (
+                time.perf_counter() - start
+            )
+
+        return df
+
+    def __compaction_options(self, compact_dtypes):
         """
-        Runs the SQL query or loads from a CSV file on the Starburst database.
+        Returns the settings that decide the dtypes of query results, to key cached
+        results on them.
         """
+        if compact_dtypes is False:
+            return {"compact_dtypes": False}
+
+        return {
+            "compact_dtypes": compact_dtypes,
+            "compact_min_rows": self.compact_min_rows,
+            "compactor": self.dtype_compactor.options(),
+        }
+
+    def __validate_engine(self, engine):
+        valid_engines = ["starburst", "bigquery", "livedb", "local"]
+        if engine not in valid_engines:
+            raise ValueError(
+                f"Invalid engine '{engine}'. Valid options are: {valid_engines}"
+            )
+
+    def __query_data(self, engine, query_replaced, fetch_options=None, stats=None):
+        self.__validate_engine(engine)
+        if engine == "local" or self.backend == "local":
+            return self.__query_data_local(engine, query_replaced, stats=stats)
+        fetch_options = fetch_options or {}
+        if engine == "starburst":
+            return self.__query_data_trino(query_replaced, stats=stats, **fetch_options)
+        if engine == "livedb":
+            return self.__query_data_livedb(
+                query_replaced, stats=stats, **fetch_options
+            )
+        return self.__query_data_bigquery(query_replaced, stats=stats, **fetch_options)
+
+    def __iter_data(
+        self, engine, query_replaced, chunk_size, fetch_options=None, stats=None
+    ):
+        self.__validate_engine(engine)
+        if engine == "local" or self.backend == "local":
+            return self.__iter_data_local(
+                engine, query_replaced, chunk_size, stats=stats
+            )
+        fetch_options = fetch_options or {}
+        if engine == "starburst":
+            return self.__iter_data_trino(
+                query_replaced, chunk_size, stats=stats, **fetch_options
+            )
+        if engine == "livedb":
+            return self.__iter_data_livedb(
+                query_replaced, chunk_size, stats=stats, **fetch_options
+            )
+        return self.__iter_data_bigquery(
+            query_replaced, chunk_size, stats=stats, **fetch_options
+        )
+
+    def __iter_query(
+        self,
+        engine,
+        query_file,
+        params=None,
+        chunk_size=100_000,
+        spill_file=None,
+        fetch_options=None,
+        sample=None,
+        sample_method="tablesample",
+        sample_key=None,
+        sample_tables=None,
+    ):
+        self.__ensure_file_exists(
+            os.path.join(self.sql_path, query_file)
+        )  # Check if the file exists
+
+        start = time.perf_counter()
+        query_replaced = self.__prepare_query(query_file, params)  # Prepare the query
+        if sample is not None:
+            query_replaced = self.__sample_query(
+                engine,
+                query_replaced,
+                sample,
+                sample_method,
+                sample_key,
+                sample_tables,
+            )
+        log_entry = self.query_log.new_entry(engine, query_file, params, query_replaced)
+        log_entry["sample"] = sample
+        log_entry["prepare_seconds"] = time.perf_counter() - start
+
+        if spill_file is not None:
+            spill_path = self.__output_dataset_path(spill_file)
+            if os.path.isdir(spill_path):
+                shutil.rmtree(spill_path)  # Do not mix chunks of different runs
+            if os.path.exists(self.__output_file_path(spill_file, "parquet")):
+                os.remove(
+                    self.__output_file_path(spill_file, "parquet")
+                )  # Saved by an older run_query_*, it would be loaded first
+            self.__ensure_directory_exists(spill_path)
+            print(spill_path)
+
+        n_rows = 0
+        try:
+            self.__check_budget(engine, query_replaced, log_entry)
+
+            for i, df in enumerate(
+                self.__iter_data(
+                    engine, query_replaced, chunk_size, fetch_options, log_entry
+                )
+            ):
+                if spill_file is not None:
+                    df.to_parquet(
+                        os.path.join(spill_path, f"part-{i:05d}.parquet"),
+                        index=False,
+                        compression="zstd",
+                    )
+                if sample is not None:
+                    df.attrs["sample"] = {
+                        "fraction": sample,
+                        "method": sample_method,
+                        "key": sample_key,
+                        "tables": sample_tables,
+                    }  # Mark the chunk as sampled
+                n_rows += len(df)
+                yield df
+        except Exception as e:
+            log_entry["error"] = repr(e)
+            raise
+        finally:
+            log_entry["rows"] = n_rows
+            self.__log_query(log_entry, start)  # Log the query
+
+    def __run_query(
+        self,
+        engine,
+        query_file,
+        params=None,
+        csv_file=None,
+        load_csv_file=False,
+        columns=None,
+        export_csv=False,
+        use_cache=True,
+        refresh_cache=False,
+        cache_ttl=None,
+        fetch_options=None,
+        partition_by=None,
+        max_workers=4,
+        retries=2,
+        incremental=False,
+        lookback_days=0,
+        sample=None,
+        sample_method="tablesample",
+        sample_key=None,
+        sample_tables=None,
+        compact_dtypes=None,
+    ):
+        if sample is not None and csv_file is not None:
+            csv_file = f"{csv_file}__sample"  # Never overwrite the full output
+
         if load_csv_file:
-            self.__ensure_file_exists(
-                os.path.join(self.output_path, f"{csv_file}.csv")
-            )  # Check if the file exists
+            return self.__load_output(csv_file, columns)
 
-            df = self.__load_from_csv(csv_file)
+        if incremental:
+            if sample is not None:
+                raise ValueError("incremental and sample cannot be used together.")
 
-        else:
             self.__ensure_file_exists(
                 os.path.join(self.sql_path, query_file)
             )  # Check if the file exists
 
-            query_replaced = self.__prepare_query(
-                query_file, params
-            )  # Prepare the query
+            return self.__run_incremental_query(
+                engine,
+                query_file,
+                params,
+                partition_by or "day",
+                lookback_days=lookback_days,
+                max_workers=max_workers,
+                retries=retries,
+                csv_file=csv_file,
+                columns=columns,
+                export_csv=export_csv,
+                fetch_options=fetch_options,
+                compact_dtypes=compact_dtypes,
+            )
+
+        if partition_by is not None:
+            return self.__run_partitioned_query(
+                engine,
+                query_file,
+                params,
+                partition_by,
+                max_workers=max_workers,
+                retries=retries,
+                csv_file=csv_file,
+                columns=columns,
+                export_csv=export_csv,
+                use_cache=use_cache,
+                refresh_cache=refresh_cache,
+                cache_ttl=cache_ttl,
+                fetch_options=fetch_options,
+                sample=sample,
+                sample_method=sample_method,
+                sample_key=sample_key,
+                sample_tables=sample_tables,
+                compact_dtypes=compact_dtypes,
+            )
+
+        self.__ensure_file_exists(
+            os.path.join(self.sql_path, query_file)
+        )  # Check if the file exists
+
+        start = time.perf_counter()
+        query_replaced = self.__prepare_query(query_file, params)  # Prepare the query
+        if sample is not None:
+            query_replaced = self.__sample_query(
+                engine,
+                query_replaced,
+                sample,
+                sample_method,
+                sample_key,
+                sample_tables,
+            )
+        log_entry = self.query_log.new_entry(engine, query_file, params, query_replaced)
+        log_entry["sample"] = sample
+        log_entry["prepare_seconds"] = time.perf_counter() - start
+
+        try:
+            df = self.__run_prepared_query(
+                engine,
+                query_replaced,
+                log_entry,
+                csv_file=csv_file,
+                columns=columns,
+                export_csv=export_csv,
+                use_cache=use_cache,
+                refresh_cache=refresh_cache,
+                cache_ttl=cache_ttl,
+                fetch_options=fetch_options,
+                compact_dtypes=compact_dtypes,
+            )
+        except Exception as e:
+            log_entry["error"] = repr(e)
+            raise
+        finally:
+            self.__log_query(log_entry, start)  # Log the query
+
+        if sample is not None:
+            df.attrs["sample"] = {
+                "fraction": sample,
+                "method": sample_method,
+                "key": sample_key,
+                "tables": sample_tables,
+            }  # Mark the results as sampled
+
+        return df
+
+    def __sample_table(self, engine, table_name, fraction, method, key):
+        if method == "tablesample":
+            if engine == "livedb":
+                raise ValueError("LiveDB only supports sample_method='hash'.")
+            percent = f"{fraction * 100:g}"
+            if engine == "bigquery":
+                percent = f"{percent} percent"
+            return f"select * from {table_name} tablesample system ({percent})"
+
+        if key is None:
+            raise ValueError("sample_method='hash' requires a sample_key column.")
+        buckets = 10_000
+        if engine == "starburst":
+            bucket = f"abs(mod(from_big_endian_64(xxhash64(to_utf8(cast({key} as varchar)))), {buckets}))"
+        elif engine == "bigquery":
+            bucket = f"abs(mod(farm_fingerprint(cast({key} as string)), {buckets}))"
+        else:
+            bucket = f"mod(crc32({key}), {buckets})"
+        return (
+            f"select * from {table_name} where {bucket} < {round(fraction * buckets)}"
+        )
+
+    def __mask_comments_and_strings(self, query):
+        """
+        Blanks out comments and string literals, keeping every other character at its
+        position, so that a from inside them, or a comment after an open paren, does
+        not mislead the table matching.
+        """
+        return re.sub(
+            r"--[^\n]*|/\*.*?\*/|'(?:[^']|'')*'",
+            lambda match: re.sub(r"[^\n]", " ", match.group(0)),
+            query,
+            flags=re.DOTALL,
+        )
+
+    def __is_function_argument(self, query, position):
+        """
+        Returns True if position is inside the parentheses of a function call rather
+        than of a subquery, e.g. the from of extract(year from created_at).
+        """
+        depth = 0
+        for i in range(position - 1, -1, -1):
+            if query[i] == ")":
+                depth += 1
+            elif query[i] == "(":
+                if depth == 0:
+                    return not re.match(
+                        r"\s*(select|with)\b", query[i + 1 :], re.IGNORECASE
+                    )
+                depth -= 1
+
+        return False
+
+    def __sample_query(
+        self, engine, query_replaced, fraction, method, key, sample_tables=None
+    ):
+        """
+        Rewrites base tables into sampled subqueries: an engine-native block sample
+        (method='tablesample') or a deterministic hash filter on the key column
+        (method='hash'), which samples the same keys in every sampled table.
+        By default only the table after every from is sampled and joined tables are
+        read in full, since sampling both sides of a join multiplies the fractions.
+        sample_tables lists the tables to sample instead, wherever they appear.
+        Tables are qualified names (schema.table, catalog.schema.table,
+        project.dataset.table or backticked), or any name on LiveDB, except the names
+        of CTEs. The subquery keeps the table alias, or the table name when it had none.
+        Raises ValueError when no table was found, rather than returning the full
+        results as a sample.
+        """
+        if method not in ["tablesample", "hash"]:
+            raise ValueError(
+                f"Invalid sample_method '{method}'. Valid options are: ['tablesample', 'hash']"
+            )
+        if not 0 < fraction <= 1:
+            raise ValueError("sample must be a fraction between 0 and 1.")
+
+        min_dots = 0 if engine == "livedb" else 1  # LiveDB uses the connection's schema
+        table_pattern = re.compile(
+            r"\b(from|join)(\s+)(`[^`]+`|[A-Za-z_][\w-]*(?:\.[A-Za-z_][\w-]*){%d,})(?![\w.(-])(\s+(?:as\s+)?(\w+))?"
+            % min_dots,
+            re.IGNORECASE,
+        )
+        masked_query = self.__mask_comments_and_strings(query_replaced)
+        cte_names = {
+            name.lower()
+            for name in re.findall(
+                r"(?:\bwith\s+(?:recursive\s+)?|,\s*)(\w+)\s*(?:\([^)]*\)\s*)?as\s*\(",
+                masked_query,
+                re.IGNORECASE,
+            )
+        }
+        if sample_tables is not None:
+            sample_tables = {table.strip("`").lower() for table in sample_tables}
+        not_aliases = {
+            "where",
+            "join",
+            "left",
+            "right",
+            "inner",
+            "full",
+            "cross",
+            "on",
+            "using",
+            "group",
+            "order",
+            "limit",
+            "union",
+            "except",
+            "intersect",
+            "window",
+            "having",
+            "qualify",
+            "natural",
+            "lateral",
+        }
+
+        sampled_tables = []
+        parts = []
+        end = 0
+        for match in table_pattern.finditer(masked_query):
+            keyword, space, table_name, alias_clause, alias = [
+                None if match.start(i) < 0 else query_replaced[slice(*match.span(i))]
+                for i in range(1, 6)
+            ]  # From the query, with its comments
+            if table_name.lower() in cte_names or self.__is_function_argument(
+                masked_query, match.start()
+            ):
+                continue
+            if sample_tables is None and keyword.lower() == "join":
+                continue  # Joined tables are read in full
+            if (
+                sample_tables is not None
+                and table_name.strip("`").lower() not in sample_tables
+            ):
+                continue
+
+            sampled_tables.append(table_name.strip("`").lower())
+            subquery = self.__sample_table(engine, table_name, fraction, method, key)
+            if alias is not None and alias.lower() not in not_aliases:
+                sampled = f"{keyword}{space}({subquery}){alias_clause}"
+            else:
+                default_alias = table_name.strip("`").split(".")[-1]
+                sampled = (
+                    f"{keyword}{space}({subquery}) {default_alias}{alias_clause or ''}"
+                )
+            parts += [query_replaced[end : match.start()], sampled]
+            end = match.end()
+        query_sampled = "".join(parts) + query_replaced[end:]
 
-            self.__log_query(query_replaced)  # Log the query
+        if sample_tables is not None and not sample_tables <= set(sampled_tables):
+            raise ValueError(
+                f"sample_tables not found in the query: {sorted(sample_tables - set(sampled_tables))}"
+            )
+        if not sampled_tables:
+            raise ValueError(
+                "sample found no table to sample in the query. Qualify the tables, e.g. schema.table."
+            )
 
-            df = self.__query_data_trino(query_replaced)  # Run the query
+        return query_sampled
 
+    def __unquote_date(self, value):
+        quote = value[0] if value[:1] in ["'", '"'] else ""
+        return pd.Timestamp(value.strip("'\"")), quote
+
+    def __build_date_windows(self, params, partition_by):
+        """
+        Splits the inclusive {start_date}..{end_date} range of params into calendar
+        aligned day, week (Monday to Sunday) or month windows.
+        Returns one params dict per window, keeping the quoting of the dates.
+        """
+        frequencies = {"day": "D", "week": "W-MON", "month": "MS"}
+        if partition_by not in frequencies:
+            raise ValueError(
+                f"Invalid partition_by '{partition_by}'. Valid options are: {list(frequencies)}"
+            )
+        if not params or "start_date" not in params or "end_date" not in params:
+            raise ValueError(
+                "partition_by requires 'start_date' and 'end_date' params."
+            )
+
+        start_date, quote = self.__unquote_date(params["start_date"])
+        end_date, _ = self.__unquote_date(params["end_date"])
+
+        window_starts = [start_date] + [
+            date
+            for date in pd.date_range(
+                start_date, end_date, freq=frequencies[partition_by]
+            )
+            if date > start_date
+        ]
+        window_ends = [date - pd.Timedelta(days=1) for date in window_starts[1:]] + [
+            end_date
+        ]
+
+        return [
+            {
+                **params,
+                "start_date": f"{quote}{window_start:%Y-%m-%d}{quote}",
+                "end_date": f"{quote}{window_end:%Y-%m-%d}{quote}",
+            }
+            for window_start, window_end in zip(window_starts, window_ends)
+        ]
+
+    def __run_query_with_retries(self, retries, *args, **kwargs):
+        for attempt in range(retries + 1):
+            try:
+                return self.__run_query(*args, **kwargs)
+            except Exception:
+                if attempt == retries:
+                    raise
+                time.sleep(2**attempt)  # Back off before retrying the window
+
+    def __run_windows(
+        self, engine, query_file, windows, max_workers=4, retries=2, **options
+    ):
+        """
+        Runs one query per date window concurrently and returns their results in order.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    self.__run_query_with_retries,
+                    retries,
+                    engine,
+                    query_file,
+                    params=window_params,
+                    **options,
+                )
+                for window_params in windows
+            ]
+
+        failed = [
+            (window_params, future.exception())
+            for window_params, future in zip(windows, futures)
+            if future.exception() is not None
+        ]
+        if failed:
+            for window_params, error in failed:
+                print(
+                    f"Window {window_params['start_date']}..{window_params['end_date']} failed: {error!r}"
+                )
+            raise failed[0][1]
+
+        return [future.result() for future in futures]
+
+    def __run_partitioned_query(
+        self,
+        engine,
+        query_file,
+        params,
+        partition_by,
+        max_workers=4,
+        retries=2,
+        csv_file=None,
+        columns=None,
+        export_csv=False,
+        compact_dtypes=None,
+        **options,
+    ):
+        """
+        Runs one query per date window concurrently and concatenates them in order.
+        Every window is cached on its own, so a rerun only fetches the missing ones.
+        Dtypes are compacted after concatenating, so that every window gets the same
+        dtypes.
+        """
+        windows = self.__build_date_windows(params, partition_by)
+
+        dfs = self.__run_windows(
+            engine,
+            query_file,
+            windows,
+            max_workers=max_workers,
+            retries=retries,
+            compact_dtypes=False,
+            **options,
+        )
+        df = pd.concat(dfs, ignore_index=True)
+        df = self.__compact_dtypes(df, compact_dtypes)
+
+        self.__save_output(df, csv_file, export_csv)  # Save the query results
+
+        if columns is not None:
+            df = df[columns]
+
+        return df
+
+    def __storage_engine(self, engine):
+        """
+        Returns the engine name under which results are cached and materialized, so
+        that results served from fixtures never mix with warehouse results.
+        """
+        if self.backend == "local":
+            return f"{engine}@local"
+        return engine
+
+    def __incremental_path(self, engine, query_file, params):
+        """
+        Returns the directory holding the materialized windows of a query, keyed on the
+        engine, the SQL text and every param except the dates.
+        """
+        with open(os.path.join(self.sql_path, query_file), "r") as f:
+            query = f.read()
+        other_params = {
+            key: value
+            for key, value in (params or {}).items()
+            if key not in ["start_date", "end_date"]
+        }
+        key = hashlib.sha256(
+            json.dumps(
+                [self.__storage_engine(engine), query, other_params], sort_keys=True
+            ).encode("utf-8")
+        ).hexdigest()
+
+        return os.path.join(self.output_path, "incremental", key)
+
+    def __load_manifest(self, incremental_path):
+        manifest_file = os.path.join(incremental_path, "manifest.json")
+        if not os.path.exists(manifest_file):
+            return {"windows": {}}
+
+        with open(manifest_file, "r") as f:
+            return json.load(f)
+
+    def __save_manifest(self, incremental_path, manifest):
+        manifest_file = os.path.join(incremental_path, "manifest.json")
+        temporary_file = temporary_path(manifest_file)
+        with open(temporary_file, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temporary_file, manifest_file)
+
+    def __run_incremental_query(
+        self,
+        engine,
+        query_file,
+        params,
+        partition_by,
+        lookback_days=0,
+        max_workers=4,
+        retries=2,
+        csv_file=None,
+        columns=None,
+        export_csv=False,
+        fetch_options=None,
+        compact_dtypes=None,
+    ):
+        """
+        Fetches only the date windows not materialized by previous runs, plus the ones
+        within lookback_days of end_date, and appends them to the stored windows.
+        Concurrent refreshes of the same query run one after the other, so the second
+        one only fetches what the first one did not.
+        """
+        windows = self.__build_date_windows(params, partition_by)
+        incremental_path = self.__incremental_path(engine, query_file, params)
+        self.__ensure_directory_exists(incremental_path)
+
+        with FileLock(os.path.join(incremental_path, "manifest.lock")):
+            df = self.__refresh_windows(
+                engine,
+                query_file,
+                windows,
+                incremental_path,
+                params,
+                lookback_days,
+                max_workers,
+                retries,
+                fetch_options,
+            )
+        df = self.__compact_dtypes(df, compact_dtypes)
+
+        self.__save_output(df, csv_file, export_csv)  # Save the query results
+
+        if columns is not None:
+            df = df[columns]
+
+        return df
+
+    def __refresh_windows(
+        self,
+        engine,
+        query_file,
+        windows,
+        incremental_path,
+        params,
+        lookback_days,
+        max_workers,
+        retries,
+        fetch_options,
+    ):
+        manifest = self.__load_manifest(incremental_path)
+
+        end_date, _ = self.__unquote_date(params["end_date"])
+        lookback_start = end_date - pd.Timedelta(days=lookback_days - 1)
+
+        def window_key(window_params):
+            return self.__unquote_date(window_params["start_date"])[0].strftime(
+                "%Y-%m-%d"
+            )
+
+        to_fetch = []
+        for window_params in windows:
+            stored = manifest["windows"].get(window_key(window_params))
+            window_end, _ = self.__unquote_date(window_params["end_date"])
+            if (
+                stored is None
+                or stored["end_date"] != window_params["end_date"]  # Partial window
+                or (lookback_days > 0 and window_end >= lookback_start)
+            ):
+                to_fetch.append(window_params)
+
+        print(f"Fetching {len(to_fetch)} of {len(windows)} windows")
+
+        dfs = self.__run_windows(
+            engine,
+            query_file,
+            to_fetch,
+            max_workers=max_workers,
+            retries=retries,
+            use_cache=False,
+            fetch_options=fetch_options,
+            compact_dtypes=False,
+        )
+
+        for window_params, df in zip(to_fetch, dfs):
+            window_file = os.path.join(
+                incremental_path, f"{window_key(window_params)}.parquet"
+            )
+            temporary_file = temporary_path(window_file)
+            df.to_parquet(temporary_file, index=False, compression="zstd")
+            os.replace(temporary_file, window_file)
+            manifest["windows"][window_key(window_params)] = {
+                "start_date": window_params["start_date"],
+                "end_date": window_params["end_date"],
+                "rows": len(df),
+                "fetched_at": time.time(),
+            }
+        self.__save_manifest(incremental_path, manifest)
+
+        df = pd.concat(
+            [
+                self.__load_from_parquet(
+                    os.path.join(
+                        incremental_path, f"{window_key(window_params)}.parquet"
+                    )
+                )
+                for window_params in windows
+            ],
+            ignore_index=True,
+        )
+
+        return df
+
+    def __load_cached(
+        self,
+        cache_key,
+        csv_file=None,
+        columns=None,
+        export_csv=False,
+        created_after=None,
+    ):
+        """
+        Returns the cached results of a query, or None on a miss. With csv_file, the
+        cached Parquet file is linked as the output, since the output holds the results
+        of the params just requested, and the results are read back from it.
+        """
+        if csv_file is None:
+            return self.cache.get(cache_key, columns, created_after=created_after)
+
+        file_path = self.__output_file_path(csv_file, "parquet")
+        if not self.cache.export(cache_key, file_path, created_after=created_after):
+            return None
+        print(file_path)
+        self.__remove_spilled_output(csv_file)
+
+        df = self.__load_from_parquet(file_path, None if export_csv else columns)
+        if export_csv:
             self.__save_to_csv(df, csv_file)  # Save the query results to a CSV file
+            if columns is not None:
+                df = df[columns]
 
         return df
 
+    def __run_prepared_query(
+        self,
+        engine,
+        query_replaced,
+        log_entry,
+        csv_file=None,
+        columns=None,
+        export_csv=False,
+        use_cache=True,
+        refresh_cache=False,
+        cache_ttl=None,
+        fetch_options=None,
+        compact_dtypes=None,
+    ):
+        """
+        Runs a prepared query through the result cache. Identical queries that are
+        already running, in this process or another one, are waited for and their
+        results reused instead of launching a second warehouse job.
+        """
+        if not use_cache:
+            return self.__execute_prepared_query(
+                engine,
+                query_replaced,
+                log_entry,
+                csv_file=csv_file,
+                columns=columns,
+                export_csv=export_csv,
+                fetch_options=fetch_options,
+                compact_dtypes=compact_dtypes,
+            )
+
+        cache_key = self.cache.build_key(
+            self.__storage_engine(engine),
+            query_replaced,
+            self.__compaction_options(compact_dtypes),
+        )  # Results are cached with the dtypes they are returned with
+        requested_at = time.time()
+
+        with self.cache.single_flight(cache_key):
+            df = self.__load_cached(
+                cache_key,
+                csv_file=csv_file,
+                columns=columns,
+                export_csv=export_csv,
+                created_after=requested_at if refresh_cache else None,
+            )  # A refresh still reuses results stored while it waited
+            if df is not None:
+                print(f"Loaded from cache: {cache_key}")
+                log_entry["cache"] = "hit"
+                log_entry["rows"] = len(df)
+
+                return df
+
+            log_entry["cache"] = "miss"
+
+            return self.__execute_prepared_query(
+                engine,
+                query_replaced,
+                log_entry,
+                csv_file=csv_file,
+                columns=columns,
+                export_csv=export_csv,
+                fetch_options=fetch_options,
+                cache_key=cache_key,
+                cache_ttl=cache_ttl,
+                compact_dtypes=compact_dtypes,
+            )
+
+    def __execute_prepared_query(
+        self,
+        engine,
+        query_replaced,
+        log_entry,
+        csv_file=None,
+        columns=None,
+        export_csv=False,
+        fetch_options=None,
+        cache_key=None,
+        cache_ttl=None,
+        compact_dtypes=None,
+    ):
+        self.__check_budget(engine, query_replaced, log_entry)
+
+        df = self.__query_data(
+            engine, query_replaced, fetch_options, log_entry
+        )  # Run the query
+        log_entry["rows"] = len(df)
+        df = self.__compact_dtypes(df, compact_dtypes, log_entry)
+
+        if cache_key is not None:
+            self.cache.put(cache_key, df, ttl=cache_ttl)  # Cache the query results
+
+        self.__save_output(df, csv_file, export_csv)  # Save the query results
+
+        if columns is not None:
+            df = df[columns]
+
+        return df
+
+    def run_query_starburst(
+        self,
+        query_file,
+        params=None,
+        csv_file=None,
+        load_csv_file=False,
+        columns=None,
+        export_csv=False,
+        use_cache=True,
+        refresh_cache=False,
+        cache_ttl=None,
+        partition_by=None,
+        max_workers=4,
+        retries=2,
+        incremental=False,
+        lookback_days=0,
+        sample=None,
+        sample_method="tablesample",
+        sample_key=None,
+        sample_tables=None,
+        compact_dtypes=None,
+    ):
+        """
+        Runs the SQL query or loads a saved output on the Starburst database.
+        Outputs are saved as Parquet under csv_file, export_csv=True also writes a CSV.
+        columns restricts the returned DataFrame to a subset of columns.
+        Results are cached on the rendered query: use_cache=False bypasses the cache,
+        refresh_cache=True re-runs the query and overwrites the cached entry.
+        partition_by ('day', 'week' or 'month') splits the start_date..end_date params
+        into windows run concurrently on max_workers threads, each cached on its own
+        and retried up to retries times, and concatenates them in order.
+        incremental=True remembers the windows already materialized for these params
+        and only fetches the new ones, plus the last lookback_days days for late data.
+        sample (a fraction, e.g. 0.01) runs the query on sampled base tables, with
+        sample_method 'tablesample' or 'hash' on the sample_key column, for fast
+        iteration. Only the table after every from is sampled, or the tables listed in
+        sample_tables, which must have sample_key with 'hash'. Sampled results are
+        cached and saved apart from the full ones, as csv_file__sample, and marked in
+        df.attrs["sample"].
+        compact_dtypes=True parses booleans and datetimes to cut the memory of the
+        results, None does it for results of at least compact_min_rows rows and False
+        keeps the driver dtypes. Smaller integers, float32 and categoricals are opt-in,
+        with q.dtype_compactor = DtypeCompactor(downcast_integers=True,
+        downcast_floats=True, categorize=True).
+        """
+        return self.__run_query(
+            "starburst",
+            query_file,
+            params=params,
+            csv_file=csv_file,
+            load_csv_file=load_csv_file,
+            columns=columns,
+            export_csv=export_csv,
+            use_cache=use_cache,
+            refresh_cache=refresh_cache,
+            cache_ttl=cache_ttl,
+            partition_by=partition_by,
+            max_workers=max_workers,
+            retries=retries,
+            incremental=incremental,
+            lookback_days=lookback_days,
+            sample=sample,
+            sample_method=sample_method,
+            sample_key=sample_key,
+            sample_tables=sample_tables,
+            compact_dtypes=compact_dtypes,
+        )
+
+    def iter_query_starburst(
+        self,
+        query_file,
+        params=None,
+        chunk_size=100_000,
+        spill_file=None,
+        sample=None,
+        sample_method="tablesample",
+        sample_key=None,
+        sample_tables=None,
+    ):
+        """
+        Runs the SQL query on the Starburst database and yields the results in
+        DataFrame chunks of chunk_size rows as they arrive, without caching them.
+        spill_file saves every chunk under query_outputs/spill_file/ as it arrives,
+        and the spilled output can be reloaded with load_csv_file=True.
+        sample, sample_method, sample_key and sample_tables behave as in run_query_*.
+        """
+        return self.__iter_query(
+            "starburst",
+            query_file,
+            params=params,
+            chunk_size=chunk_size,
+            spill_file=spill_file,
+            sample=sample,
+            sample_method=sample_method,
+            sample_key=sample_key,
+            sample_tables=sample_tables,
+        )
+
+    def estimate_query_starburst(self, query_file, params=None):
+        """
+        Returns the bytes the SQL query is estimated to scan on the Starburst database,
+        and its EXPLAIN (TYPE IO) plan, without running it.
+        """
+        self.__ensure_file_exists(os.path.join(self.sql_path, query_file))
+
+        return self.__estimate_query(
+            "starburst", self.__prepare_query(query_file, params)
+        )
+
+    def query_report(self, n=10, sort_by="total_seconds"):
+        """
+        Returns the n logged queries with the highest sort_by, aggregated over their runs.
+        Use 'total_seconds' for the slowest and 'bytes_processed' for the most expensive.
+        """
+        return self.query_log.report(n=n, sort_by=sort_by)
+
+    def run_queries(self, jobs, max_workers=4, **options):
+        """
+        Runs independent queries concurrently and yields their results as they complete.
+        jobs is a list of (engine, query_file, params) or (engine, query_file, params,
+        csv_file) tuples, with engine in ['starburst', 'bigquery', 'livedb']. Only jobs
+        with a csv_file save an output, since jobs on the same SQL with other params
+        would overwrite each other's. options are passed to every run_query_* call, and
+        the fetch options of an engine (e.g. progress_callback of run_query_bigquery)
+        only to the jobs of that engine.
+        Yields one dict per job with its index, job, DataFrame and error: a failing job
+        reports its exception without aborting the rest of the batch.
+        """
+        for job in jobs:
+            self.__validate_engine(job[0])
+
+        fetch_option_names = {
+            "bigquery": ["progress_callback", "max_stream_count", "bounded_memory"],
+            "livedb": ["chunk_size"],
+        }
+        all_fetch_option_names = sum(fetch_option_names.values(), [])
+        run_options = {
+            name: value
+            for name, value in options.items()
+            if name not in all_fetch_option_names
+        }
+
+        def run_job(job):
+            engine, query_file, params = job[:3]
+            csv_file = job[3] if len(job) > 3 else None
+            fetch_options = {
+                name: options[name]
+                for name in fetch_option_names.get(engine, [])
+                if name in options
+            }
+            return self.__run_query(
+                engine,
+                query_file,
+                params=params,
+                csv_file=csv_file,
+                fetch_options=fetch_options,
+                **run_options,
+            )
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(run_job, job): (i, job) for i, job in enumerate(jobs)
+            }
+            for future in as_completed(futures):
+                i, job = futures[future]
+                error = future.exception()
+                yield {
+                    "index": i,
+                    "job": job,
+                    "df": None if error is not None else future.result(),
+                    "error": error,
+                }
+
     def __build_sql_query(self, table_name):
         query = f"select * from {table_name} limit 10"
 
         return query
 
+    def __explore_table(self, engine, table_name, query):
+        start = time.perf_counter()
+        log_entry = self.query_log.new_entry(engine, table_name, None, query)
+
+        try:
+            df = self.__query_data(engine, query, stats=log_entry)
+            log_entry["rows"] = len(df)
+        except Exception as e:
+            log_entry["error"] = repr(e)
+            raise
+        finally:
+            self.__log_query(log_entry, start)  # Log the query
+
+        return df
+
+    def __is_profilable_type(self, column_type):
+        return not column_type.lower().startswith(
+            ("array", "map", "row", "struct", "json", "record", "geography")
+        )
+
+    def __build_profile_query(self, engine, table_name, schema, sample_percent):
+        """
+        Returns a query computing null rate, distinct estimate, min and max of every
+        column on a block sample of the table, which skips most of the data files.
+        """
+        if engine == "starburst":
+            quote, sample = '"', f"tablesample system ({sample_percent})"
+            count_nulls, count_distinct, text = "count_if", "approx_distinct", "varchar"
+        else:
+            quote, sample = "`", f"tablesample system ({sample_percent} percent)"
+            count_nulls, count_distinct = "countif", "approx_count_distinct"
+            text = "string"
+
+        expressions = ["count(*) as sampled_rows"]
+        for i, (column, column_type) in enumerate(
+            zip(schema["column"], schema["type"])
+        ):
+            identifier = f"{quote}{column}{quote}"
+            expressions.append(f"{count_nulls}({identifier} is null) as nulls_{i}")
+            if self.__is_profilable_type(column_type):
+                expressions += [
+                    f"{count_distinct}({identifier}) as distinct_{i}",
+                    f"cast(min({identifier}) as {text}) as min_{i}",
+                    f"cast(max({identifier}) as {text}) as max_{i}",
+                ]
+
+        return f"select {', '.join(expressions)} from {table_name} {sample}"
+
+    def __profile_from_sample(self, engine, table_name, schema, sample_percent):
+        query = self.__build_profile_query(engine, table_name, schema, sample_percent)
+        sample = self.__explore_table(engine, table_name, query).iloc[0]
+        sampled_rows = sample["sampled_rows"]
+
+        column_stats = pd.DataFrame(
+            {
+                "column": schema["column"],
+                "null_fraction": [
+                    sample[f"nulls_{i}"] / sampled_rows if sampled_rows else None
+                    for i in range(len(schema))
+                ],
+                "distinct_estimate": [
+                    sample.get(f"distinct_{i}") for i in range(len(schema))
+                ],
+                "min": [sample.get(f"min_{i}") for i in range(len(schema))],
+                "max": [sample.get(f"max_{i}") for i in range(len(schema))],
+                "source": f"sample_{sample_percent}_percent",
+            }
+        )
+        row_count_estimate = int(sampled_rows * 100 / sample_percent)
+
+        return column_stats, row_count_estimate
+
+    def __fetch_profile_starburst(self, table_name, sample_percent):
+        schema = self.__explore_table(
+            "starburst", table_name, f"describe {table_name}"
+        ).rename(columns={"Column": "column", "Type": "type"})[["column", "type"]]
+
+        create_table = self.__explore_table(
+            "starburst", table_name, f"show create table {table_name}"
+        ).iloc[0, 0]
+        partitioning = re.search(
+            r"(?:partitioned_by|partitioning)\s*=\s*ARRAY\[(.*?)\]", create_table
+        )
+        partition_columns = (
+            re.findall(r"'([^']*)'", partitioning.group(1)) if partitioning else []
+        )
+
+        stats = self.__explore_table(
+            "starburst", table_name, f"show stats for {table_name}"
+        )  # Read from the connector metadata, without scanning the table
+        row_count = stats.loc[stats["column_name"].isna(), "row_count"].max()
+        column_stats = (
+            stats[stats["column_name"].notna()]
+            .rename(
+                columns={
+                    "column_name": "column",
+                    "nulls_fraction": "null_fraction",
+                    "distinct_values_count": "distinct_estimate",
+                    "low_value": "min",
+                    "high_value": "max",
+                }
+            )[["column", "null_fraction", "distinct_estimate", "min", "max"]]
+            .assign(source="metadata")
+        )
+
+        if column_stats["null_fraction"].isna().all() or pd.isna(row_count):
+            column_stats, row_count_estimate = self.__profile_from_sample(
+                "starburst", table_name, schema, sample_percent
+            )  # The connector has no statistics for this table
+            if pd.isna(row_count):
+                row_count = row_count_estimate
+
+        return {
+            "row_count": None if pd.isna(row_count) else int(row_count),
+            "size_bytes": None,
+            "partition_columns": partition_columns,
+            "schema": schema,
+            "column_stats": column_stats.reset_index(drop=True),
+        }
+
+    def __fetch_profile_bigquery(self, table_name, sample_percent):
+        table = self.__get_bigquery_client().get_table(
+            table_name.strip("`")
+        )  # Metadata only, free of charge
+
+        schema = pd.DataFrame(
+            {
+                "column": [field.name for field in table.schema],
+                "type": [field.field_type for field in table.schema],
+            }
+        )
+
+        partition_columns = []
+        if table.time_partitioning is not None:
+            partition_columns.append(table.time_partitioning.field or "_PARTITIONTIME")
+        if table.range_partitioning is not None:
+            partition_columns.append(table.range_partitioning.field)
+
+        column_stats, _ = self.__profile_from_sample(
+            "bigquery", f"`{table_name.strip('`')}`", schema, sample_percent
+        )
+
+        return {
+            "row_count": table.num_rows,
+            "size_bytes": table.num_bytes,
+            "partition_columns": partition_columns,
+            "clustering_columns": table.clustering_fields or [],
+            "schema": schema,
+            "column_stats": column_stats,
+        }
+
+    def __run_table_profile(self, engine, table_name, refresh, ttl, sample_percent):
+        if self.backend == "local":
+            raise ValueError("Table profiles are not available with backend='local'.")
+
+        if not refresh:
+            profile = self.table_profiles.get(engine, table_name, ttl)
+            if profile is not None:
+                return profile
+
+        if engine == "starburst":
+            profile = self.__fetch_profile_starburst(table_name, sample_percent)
+        else:
+            profile = self.__fetch_profile_bigquery(table_name, sample_percent)
+
+        profile = {
+            "table": table_name,
+            "engine": engine,
+            "fetched_at": time.time(),
+            **profile,
+        }
+        self.table_profiles.put(engine, table_name, profile)
+
+        return profile
+
+    def run_table_profile_starburst(
+        self, table_name, refresh=False, ttl=None, sample_percent=1
+    ):
+        """
+        Returns a dict with the schema, partition columns, row count and per-column
+        stats (null fraction, distinct estimate, min, max) of a table.
+        Stats come from the connector metadata, or from a sample_percent block sample
+        when the table has none, never from a full scan. Profiles are cached for ttl
+        seconds under THOTH_SHARED_PATH, so other notebooks reuse them.
+        """
+        return self.__run_table_profile(
+            "starburst", table_name, refresh, ttl, sample_percent
+        )
+
     def run_table_explorer_starburst(self, table_name):
         """
         Returns a DataFrame of a table. Used for exploratory data analysis.
@@ -143,49 +1935,311 @@ class QueryEngines:
 
         query = self.__build_sql_query(table_name)
 
-        df = self.__query_data_trino(query)
+        df = self.__explore_table("starburst", table_name, query)
 
         return df
 
     def __authenticate_bigquery(self):
+        """
+        Reuses valid application-default credentials and only runs the gcloud login
+        when they are missing or can no longer be refreshed.
+        """
+        import google.auth
+        from google.auth import exceptions
+        from google.auth.transport.requests import Request
+
+        try:
+            credentials, _ = google.auth.default()
+            if not credentials.valid:
+                credentials.refresh(Request())
+            return
+        except (exceptions.DefaultCredentialsError, exceptions.RefreshError):
+            pass
+
         os.system("gcloud auth application-default login --billing-project dhub-glovo")
 
     def run_query_bigquery(
-        self, query_file, params=None, csv_file=None, load_csv_file=False
+        self,
+        query_file,
+        params=None,
+        csv_file=None,
+        load_csv_file=False,
+        columns=None,
+        export_csv=False,
+        use_cache=True,
+        refresh_cache=False,
+        cache_ttl=None,
+        progress_callback=None,
+        max_stream_count=None,
+        bounded_memory=False,
+        partition_by=None,
+        max_workers=4,
+        retries=2,
+        incremental=False,
+        lookback_days=0,
+        sample=None,
+        sample_method="tablesample",
+        sample_key=None,
+        sample_tables=None,
+        compact_dtypes=None,
     ):
         """
-        Runs the SQL query or loads from a CSV file on the BigQuery database.
+        Runs the SQL query or loads a saved output on the BigQuery database.
+        Outputs are saved as Parquet under csv_file, export_csv=True also writes a CSV.
+        columns restricts the returned DataFrame to a subset of columns.
+        Results are cached on the rendered query: use_cache=False bypasses the cache,
+        refresh_cache=True re-runs the query and overwrites the cached entry.
+        partition_by ('day', 'week' or 'month') splits the start_date..end_date params
+        into windows run concurrently on max_workers threads, each cached on its own
+        and retried up to retries times, and concatenates them in order.
+        incremental=True remembers the windows already materialized for these params
+        and only fetches the new ones, plus the last lookback_days days for late data.
+        sample (a fraction, e.g. 0.01) runs the query on sampled base tables, with
+        sample_method 'tablesample' or 'hash' on the sample_key column, for fast
+        iteration. Only the table after every from is sampled, or the tables listed in
+        sample_tables, which must have sample_key with 'hash'. Sampled results are
+        cached and saved apart from the full ones, as csv_file__sample, and marked in
+        df.attrs["sample"].
+        Rows are downloaded as Arrow record batches, over parallel BigQuery Storage
+        streams when available: progress_callback(rows_fetched, total_rows) is called
+        per batch, max_stream_count caps the parallel streams and bounded_memory=True
+        keeps a single stream and batch in flight.
         """
+        return self.__run_query(
+            "bigquery",
+            query_file,
+            params=params,
+            csv_file=csv_file,
+            load_csv_file=load_csv_file,
+            columns=columns,
+            export_csv=export_csv,
+            use_cache=use_cache,
+            refresh_cache=refresh_cache,
+            cache_ttl=cache_ttl,
+            fetch_options={
+                "progress_callback": progress_callback,
+                "max_stream_count": max_stream_count,
+                "bounded_memory": bounded_memory,
+            },
+            partition_by=partition_by,
+            max_workers=max_workers,
+            retries=retries,
+            incremental=incremental,
+            lookback_days=lookback_days,
+            sample=sample,
+            sample_method=sample_method,
+            sample_key=sample_key,
+            sample_tables=sample_tables,
+            compact_dtypes=compact_dtypes,
+        )
 
-        if load_csv_file:
-            self.__ensure_file_exists(os.path.join(self.output_path, f"{csv_file}.csv"))
+    def iter_query_bigquery(
+        self,
+        query_file,
+        params=None,
+        chunk_size=100_000,
+        spill_file=None,
+        max_stream_count=None,
+        sample=None,
+        sample_method="tablesample",
+        sample_key=None,
+        sample_tables=None,
+    ):
+        """
+        Runs the SQL query on the BigQuery database and yields the results in
+        DataFrame chunks of chunk_size rows as they arrive, without caching them.
+        spill_file saves every chunk under query_outputs/spill_file/ as it arrives,
+        and the spilled output can be reloaded with load_csv_file=True.
+        sample, sample_method, sample_key and sample_tables behave as in run_query_*.
+        """
+        return self.__iter_query(
+            "bigquery",
+            query_file,
+            params=params,
+            chunk_size=chunk_size,
+            spill_file=spill_file,
+            sample=sample,
+            sample_method=sample_method,
+            sample_key=sample_key,
+            sample_tables=sample_tables,
+            fetch_options={
+                "max_stream_count": max_stream_count,
+                "bounded_memory": max_stream_count is None,
+            },
+        )
 
-            df = self.__load_from_csv(csv_file)
+    def estimate_query_bigquery(self, query_file, params=None):
+        """
+        Returns the bytes the SQL query will process on the BigQuery database, and the
+        tables it references, from a dry run that is free of charge.
+        """
+        self.__ensure_file_exists(os.path.join(self.sql_path, query_file))
 
-        else:
-            self.__ensure_file_exists(
-                os.path.join(self.sql_path, query_file)
-            )  # Check if the file exists
+        return self.__estimate_query(
+            "bigquery", self.__prepare_query(query_file, params)
+        )
 
-            query_replaced = self.__prepare_query(
-                query_file, params
-            )  # Prepare the query
+    def run_table_explorer_bigquery(self, table_name):
+        """
+        Returns a DataFrame of a table. Used for exploratory data analysis.
+        """
 
-            self.__log_query(query_replaced)  # Log the query
+        query = self.__build_sql_query(table_name)
 
-            df = self.__query_data_bigquery(query_replaced)  # Run the query
-
-            self.__save_to_csv(df, csv_file)  # Save the query results to a CSV file
+        df = self.__explore_table("bigquery", table_name, query)
 
         return df
 
-    def run_table_explorer_bigquery(self, table_name):
+    def run_table_profile_bigquery(
+        self, table_name, refresh=False, ttl=None, sample_percent=1
+    ):
+        """
+        Returns a dict with the schema, partition and clustering columns, row count,
+        size and per-column stats (null fraction, distinct estimate, min, max) of a table.
+        Row count and size come from the table metadata and stats from a sample_percent
+        block sample, never from a full scan. Profiles are cached for ttl seconds under
+        THOTH_SHARED_PATH, so other notebooks reuse them.
+        """
+        return self.__run_table_profile(
+            "bigquery", table_name, refresh, ttl, sample_percent
+        )
+
+    def run_query_livedb(
+        self,
+        query_file,
+        params=None,
+        csv_file=None,
+        load_csv_file=False,
+        columns=None,
+        export_csv=False,
+        use_cache=True,
+        refresh_cache=False,
+        cache_ttl=None,
+        chunk_size=10_000,
+        partition_by=None,
+        max_workers=2,
+        retries=2,
+        incremental=False,
+        lookback_days=0,
+        sample=None,
+        sample_method="hash",
+        sample_key=None,
+        sample_tables=None,
+        compact_dtypes=None,
+    ):
+        """
+        Runs the SQL query or loads a saved output on the LiveDB (MySQL) replica.
+        Rows are streamed from an unbuffered cursor in chunks of chunk_size, on pooled
+        read-only connections with a statement timeout of livedb_timeout_seconds.
+        Only sample_method='hash' is available for sample.
+        The other options behave as in run_query_starburst.
+        """
+        return self.__run_query(
+            "livedb",
+            query_file,
+            params=params,
+            csv_file=csv_file,
+            load_csv_file=load_csv_file,
+            columns=columns,
+            export_csv=export_csv,
+            use_cache=use_cache,
+            refresh_cache=refresh_cache,
+            cache_ttl=cache_ttl,
+            fetch_options={"chunk_size": chunk_size},
+            partition_by=partition_by,
+            max_workers=max_workers,
+            retries=retries,
+            incremental=incremental,
+            lookback_days=lookback_days,
+            sample=sample,
+            sample_method=sample_method,
+            sample_key=sample_key,
+            sample_tables=sample_tables,
+            compact_dtypes=compact_dtypes,
+        )
+
+    def iter_query_livedb(
+        self,
+        query_file,
+        params=None,
+        chunk_size=10_000,
+        spill_file=None,
+        sample=None,
+        sample_method="hash",
+        sample_key=None,
+        sample_tables=None,
+    ):
+        """
+        Runs the SQL query on the LiveDB (MySQL) replica and yields the results in
+        DataFrame chunks of chunk_size rows as they are streamed from the server.
+        spill_file saves every chunk under query_outputs/spill_file/ as it arrives,
+        and the spilled output can be reloaded with load_csv_file=True.
+        sample, sample_method, sample_key and sample_tables behave as in run_query_*.
+        """
+        return self.__iter_query(
+            "livedb",
+            query_file,
+            params=params,
+            chunk_size=chunk_size,
+            spill_file=spill_file,
+            sample=sample,
+            sample_method=sample_method,
+            sample_key=sample_key,
+            sample_tables=sample_tables,
+        )
+
+    def run_table_explorer_livedb(self, table_name):
         """
         Returns a DataFrame of a table. Used for exploratory data analysis.
         """
 
         query = self.__build_sql_query(table_name)
 
-        df = self.__query_data_bigquery(query)
+        df = self.__explore_table("livedb", table_name, query)
 
         return df
+
+    def run_query_local(
+        self,
+        query_file,
+        params=None,
+        csv_file=None,
+        load_csv_file=False,
+        columns=None,
+        export_csv=False,
+        compact_dtypes=None,
+    ):
+        """
+        Runs the SQL query locally with DuckDB over the saved outputs, without a
+        warehouse round-trip. Every output under query_outputs is a table named after
+        its csv_file without the .sql extension (orders.sql -> orders), including
+        directories of chunks spilled by iter_query_*, so cached results can be joined
+        or filtered in SQL before loading them into pandas.
+        The other options behave as in run_query_starburst.
+        """
+        return self.__run_query(
+            "local",
+            query_file,
+            params=params,
+            csv_file=csv_file,
+            load_csv_file=load_csv_file,
+            columns=columns,
+            export_csv=export_csv,
+            use_cache=False,  # Outputs change under the same SQL
+            compact_dtypes=compact_dtypes,
+        )
+
+    def iter_query_local(
+        self, query_file, params=None, chunk_size=100_000, spill_file=None
+    ):
+        """
+        Runs the SQL query locally with DuckDB over the saved outputs, as in
+        run_query_local, and yields the results in DataFrame chunks of chunk_size rows.
+        """
+        return self.__iter_query(
+            "local",
+            query_file,
+            params=params,
+            chunk_size=chunk_size,
+            spill_file=spill_file,
+        )
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+import pandas as pd
+
+
+class QueryLog:
+    """
+    A class to keep an append-only log of the queries run and where their time went.
+
+    Every entry is a JSON line with the engine, the query file, the SQL hash and text,
+    the params, the cache outcome ('hit', 'miss' or 'bypass'), the sample fraction if the
+    query was sampled, the row count, the bytes estimated before running and the bytes
+    processed and billed by the warehouse, the memory saved by compacting the dtypes,
+    the error if any, and these timings in seconds:
+        prepare_seconds: reading the SQL file and replacing the params.
+        queue_seconds: waiting in the warehouse queue.
+        execution_seconds: running on the warehouse.
+        fetch_seconds: transferring rows to the client once the query has run.
+        conversion_seconds: building the DataFrame and compacting its dtypes.
+        total_seconds: wall time of the whole call.
+    """
+
+    def __init__(self, log_path):
+        self.log_path = log_path
+        self.log_file = os.path.join(self.log_path, "queries.jsonl")
+        self.__lock = threading.Lock()
+
+        if not os.path.exists(self.log_path):
+            os.makedirs(self.log_path)
+
+    def new_entry(self, engine, query_file, params, query):
+        """
+        Returns a log entry for a query, to be completed while it runs.
+        """
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "engine": engine,
+            "query_file": query_file,
+            "sql_hash": hashlib.sha256(query.encode("utf-8")).hexdigest(),
+            "sql": query,
+            "params": params,
+            "cache": "bypass",
+            "sample": None,
+            "rows": None,
+            "bytes_estimate": None,
+            "bytes_processed": None,
+            "bytes_billed": None,
+            "memory_saved_bytes": None,
+            "prepare_seconds": None,
+            "queue_seconds": None,
+            "execution_seconds": None,
+            "fetch_seconds": None,
+            "conversion_seconds": None,
+            "total_seconds": None,
+            "error": None,
+        }
+
+    def append(self, entry):
+        """
+        Appends an entry to the log.
+        """
+        line = json.dumps(entry, default=str)
+        with self.__lock:
+            with open(self.log_file, "a") as f:
+                f.write(line + "\n")
+
+    def load(self):
+        """
+        Returns the whole log as a DataFrame, one row per query run.
+        """
+        if not os.path.exists(self.log_file):
+            return pd.DataFrame()
+
+        with open(self.log_file, "r") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+
+        df = pd.DataFrame(entries)
+        df["timestamp"] = pd.to_datetime(df["timestamp"], format="ISO8601")
+
+        return df
+
+    def report(self, n=10, sort_by="total_seconds"):
+        """
+        Returns the n queries with the highest sort_by, aggregated over their runs.
+        Use 'total_seconds' for the slowest and 'bytes_processed' for the most expensive.
+        """
+        df = self.load()
+        if df.empty:
+            return df
+
+        report = (
+            df.groupby(["engine", "query_file", "sql_hash"], dropna=False)
+            .agg(
+                runs=("sql_hash", "size"),
+                cache_hits=("cache", lambda cache: (cache == "hit").sum()),
+                errors=("error", "count"),
+                rows=("rows", "max"),
+                bytes_estimate=("bytes_estimate", "sum"),
+                bytes_processed=("bytes_processed", "sum"),
+                bytes_billed=("bytes_billed", "sum"),
+                queue_seconds=("queue_seconds", "mean"),
+                execution_seconds=("execution_seconds", "mean"),
+                fetch_seconds=("fetch_seconds", "mean"),
+                conversion_seconds=("conversion_seconds", "mean"),
+                total_seconds=("total_seconds", "mean"),
+                last_run=("timestamp", "max"),
+            )
+            .reset_index()
+        )
+
+        return report.sort_values(sort_by, ascending=False).head(n)
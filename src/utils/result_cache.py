@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+
+import pyarrow.parquet as pq
+
+from .file_lock import FileLock, temporary_path
+
+
+class ResultCache:
+    """
+    A class to cache query results on disk, keyed on the rendered SQL and the engine.
+    The cache can be shared by several processes: index updates hold a file lock and
+    every file is written to a temporary path and atomically renamed.
+    """
+
+    def __init__(self, cache_path, ttl=24 * 60 * 60, max_bytes=2 * 1024**3):
+        self.cache_path = cache_path
+        self.index_file = os.path.join(self.cache_path, "index.json")
+        self.ttl = ttl  # Default time to live of an entry, in seconds
+        self.max_bytes = max_bytes  # Total size of the cache before evicting
+        self.__lock = FileLock(
+            os.path.join(self.cache_path, "index.lock")
+        )  # Serializes index updates across threads and processes
+
+        self.__ensure_directory_exists(self.cache_path)
+        self.__ensure_directory_exists(os.path.join(self.cache_path, "locks"))
+
+    def __ensure_directory_exists(self, directory_path):
+        if not os.path.exists(directory_path):
+            os.makedirs(directory_path)
+
+    def __load_index(self):
+        if not os.path.exists(self.index_file):
+            return {}
+
+        with open(self.index_file, "r") as f:
+            try:
+                return json.load(f)
+            except json.JSONDecodeError:
+                return {}  # A corrupted index only costs a cache miss
+
+    def __save_index(self, index):
+        temporary_file = temporary_path(self.index_file)
+        with open(temporary_file, "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(temporary_file, self.index_file)
+
+    def __entry_path(self, key):
+        return os.path.join(self.cache_path, f"{key}.parquet")
+
+    def __remove_entry(self, index, key):
+        index.pop(key, None)
+        if os.path.exists(self.__entry_path(key)):
+            os.remove(self.__entry_path(key))
+
+    def __is_expired(self, entry):
+        if entry["ttl"] is None:
+            return False
+        return time.time() > entry["created_at"] + entry["ttl"]
+
+    def __evict(self, index):
+        """
+        Removes the least recently used entries until the cache fits in max_bytes.
+        """
+        total_bytes = sum(entry["size"] for entry in index.values())
+        lru_keys = sorted(index, key=lambda key: index[key]["last_access"])
+
+        for key in lru_keys:
+            if total_bytes <= self.max_bytes:
+                break
+            total_bytes -= index[key]["size"]
+            self.__remove_entry(index, key)
+
+    def build_key(self, engine, query, options=None):
+        """
+        Returns the cache key of a rendered query on a given engine. options holds the
+        settings that change the stored results, e.g. the dtype compaction.
+        """
+        key = f"{engine}\n{query}"
+        if options is not None:
+            key += "\n" + json.dumps(options, sort_keys=True)
+
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    @contextmanager
+    def single_flight(self, key):
+        """
+        Holds the lock of a key while its query runs, so that identical queries from
+        other threads or processes wait for its results instead of running again.
+        """
+        lock = FileLock(os.path.join(self.cache_path, "locks", f"{key}.lock"))
+        if not lock.acquire(blocking=False):
+            print(f"Waiting for an identical query already running: {key}")
+            lock.acquire()
+
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def __touch(self, key, created_after=None):
+        """
+        Returns True and marks the entry as used if it is cached and not expired.
+        """
+        with self.__lock:
+            index = self.__load_index()
+            entry = index.get(key)
+
+            if entry is None:
+                return False
+
+            if created_after is not None and entry["created_at"] < created_after:
+                return False
+
+            if self.__is_expired(entry) or not os.path.exists(self.__entry_path(key)):
+                self.__remove_entry(index, key)
+                self.__save_index(index)
+                return False
+
+            entry["last_access"] = time.time()
+            self.__save_index(index)
+
+        return True
+
+    def get(self, key, columns=None, created_after=None):
+        """
+        Returns the cached DataFrame, or None if the entry is missing or expired.
+        columns restricts the read to a subset of columns.
+        created_after (a time.time() timestamp) ignores entries stored before it.
+        """
+        if not self.__touch(key, created_after):
+            return None
+
+        try:
+            table = pq.read_table(
+                self.__entry_path(key), columns=columns, memory_map=True
+            )
+        except FileNotFoundError:
+            return None  # Evicted by another thread or process since the index was read
+
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+
+        return df
+
+    def export(self, key, file_path, created_after=None):
+        """
+        Places the cached Parquet file of an entry at file_path, without decoding it,
+        and returns False if the entry is missing or expired. The file is hard-linked
+        when possible and copied otherwise, e.g. across file systems. Entries and
+        outputs are only ever replaced by a rename, so the link never sees a change.
+        """
+        if not self.__touch(key, created_after):
+            return False
+
+        temporary_file = temporary_path(file_path)
+        try:
+            try:
+                os.link(self.__entry_path(key), temporary_file)
+            except OSError:
+                shutil.copyfile(self.__entry_path(key), temporary_file)
+        except FileNotFoundError:
+            return (
+                False  # Evicted by another thread or process since the index was read
+            )
+        os.replace(temporary_file, file_path)
+
+        return True
+
+    def put(self, key, df, ttl=None):
+        """
+        Stores a DataFrame in the cache. ttl overrides the default time to live.
+        """
+        temporary_file = temporary_path(self.__entry_path(key))
+        df.to_parquet(temporary_file, index=False, compression="zstd")
+
+        with self.__lock:
+            os.replace(temporary_file, self.__entry_path(key))
+
+            now = time.time()
+            index = self.__load_index()
+            index[key] = {
+                "created_at": now,
+                "last_access": now,
+                "ttl": self.ttl if ttl is None else ttl,
+                "size": os.path.getsize(self.__entry_path(key)),
+            }
+
+            self.__evict(index)
+            self.__save_index(index)
+
+    def invalidate(self, key):
+        """
+        Removes a single entry from the cache.
+        """
+        with self.__lock:
+            index = self.__load_index()
+            self.__remove_entry(index, key)
+            self.__save_index(index)
+
+    def clear(self):
+        """
+        Removes every entry from the cache.
+        """
+        with self.__lock:
+            index = self.__load_index()
+            for key in list(index):
+                self.__remove_entry(index, key)
+            self.__save_index(index)
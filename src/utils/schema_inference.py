@@ -0,0 +1,170 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from pandas.api import types
+from pandas.tseries.api import guess_datetime_format
+
+
+class SchemaInference:
+    """
+    A class to detect the datetime columns of a DataFrame and parse them once.
+
+    The format of a column is guessed from its first value and checked on a sample,
+    and the whole column is then parsed in one vectorized pass with that format.
+    Parsed columns are cached across every SchemaInference of the process, keyed on
+    a hash of all the values of the column, so repeated pivots and plots of the same
+    data skip parsing, while a column edited in place is parsed again. The cache holds
+    at most max_cached_bytes of parsed values, least recently used evicted first, and
+    columns larger than that are parsed without being cached. Categorical columns only
+    parse their categories. The caller's DataFrame is never modified.
+    """
+
+    DATETIME_OBJECTS = "objects"  # date/datetime objects from the drivers
+
+    __cache = OrderedDict()  # Column key -> (parsed values, bytes), LRU first
+    __cache_bytes = 0
+    __cache_lock = threading.Lock()
+
+    def __init__(self, sample_size=10_000, max_cached_bytes=256 * 1024**2):
+        self.sample_size = sample_size  # Rows inspected before parsing a column
+        self.max_cached_bytes = max_cached_bytes  # Shared by the whole process
+
+    def __sample(self, series):
+        non_null = series.dropna()
+        if len(non_null) > self.sample_size:
+            return non_null.sample(self.sample_size, random_state=0)
+        return non_null
+
+    def __column_key(self, series):
+        """
+        Hashes the values and the dtype of a column in one vectorized pass, like
+        PivotCache, so that any change to the values gives another key.
+        """
+        hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+        digest = hashlib.sha256(hashes.tobytes())
+        digest.update(str(series.dtype).encode("utf-8"))
+
+        return digest.hexdigest()
+
+    def datetime_format(self, series):
+        """
+        Returns the datetime format of a column of strings, DATETIME_OBJECTS for a
+        column of date/datetime objects, or None if it does not hold datetimes.
+        """
+        if not (
+            types.is_object_dtype(series.dtype) or types.is_string_dtype(series.dtype)
+        ):
+            return None
+
+        sample = self.__sample(series)
+        if sample.empty:
+            return None
+
+        first = sample.iloc[0]
+        if hasattr(first, "isoformat"):
+            if all(hasattr(value, "isoformat") for value in sample):
+                return self.DATETIME_OBJECTS
+            return None
+
+        if not isinstance(first, str):
+            return None
+
+        for dayfirst in [False, True]:  # 01/02/2024 is read month first, then day first
+            datetime_format = guess_datetime_format(first, dayfirst=dayfirst)
+            if datetime_format is None:
+                continue
+            try:
+                pd.to_datetime(sample, format=datetime_format)
+            except (TypeError, ValueError, OverflowError):
+                continue  # Not every value has this format
+
+            return datetime_format
+
+        return None
+
+    def __parse(self, series):
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = pd.Series(series.cat.categories)
+            parsed_categories = self.__parse(categories)
+            if parsed_categories is None:
+                return None
+            codes = series.cat.codes.to_numpy()
+            parsed = parsed_categories.to_numpy()[np.maximum(codes, 0)]
+            parsed[codes < 0] = np.datetime64("NaT")
+            return pd.Series(parsed, index=series.index, name=series.name)
+
+        datetime_format = self.datetime_format(series)
+        if datetime_format is None:
+            return None
+
+        try:
+            if datetime_format == self.DATETIME_OBJECTS:
+                return pd.to_datetime(series)
+            codes, uniques = pd.factorize(series)  # Every distinct value parsed once
+            parsed_uniques = pd.to_datetime(
+                uniques, format=datetime_format, errors="coerce"
+            )
+        except (TypeError, ValueError, OverflowError):
+            return None
+
+        if parsed_uniques.isna().any():
+            return None  # Some values outside the sample have another format
+
+        parsed = parsed_uniques.take(codes, allow_fill=True, fill_value=pd.NaT)
+
+        return pd.Series(parsed, index=series.index, name=series.name)
+
+    def to_datetime(self, series, cache=True):
+        """
+        Returns the column parsed as datetimes, or the column itself if it does not
+        hold datetimes. Datetime columns are returned as they are.
+        """
+        if types.is_datetime64_any_dtype(series.dtype):
+            return series
+        if not (
+            types.is_object_dtype(series.dtype)
+            or types.is_string_dtype(series.dtype)
+            or isinstance(series.dtype, pd.CategoricalDtype)
+        ):
+            return series  # Numbers are not parsed as epochs
+
+        cache = cache and not isinstance(series.dtype, pd.CategoricalDtype)
+        key = self.__column_key(series) if cache else None
+        if key is not None:
+            with SchemaInference.__cache_lock:
+                if key in SchemaInference.__cache:
+                    SchemaInference.__cache.move_to_end(key)
+                    values, _ = SchemaInference.__cache[key]
+                    if values is None:
+                        return series
+                    return pd.Series(
+                        values, index=series.index, name=series.name
+                    )  # Same values, under the caller's index and name
+
+        parsed = self.__parse(series)
+
+        if key is not None:
+            self.__cache_values(key, None if parsed is None else parsed.array)
+
+        return series if parsed is None else parsed
+
+    def __cache_values(self, key, values):
+        """
+        Caches the parsed values of a column without its index, evicting the least
+        recently used columns until the cache fits in max_cached_bytes.
+        """
+        nbytes = len(key) + (0 if values is None else values.nbytes)  # Key counted too
+        if nbytes > self.max_cached_bytes:
+            return  # Would evict every other column and still not fit
+
+        with SchemaInference.__cache_lock:
+            if key in SchemaInference.__cache:
+                SchemaInference.__cache_bytes -= SchemaInference.__cache.pop(key)[1]
+            SchemaInference.__cache[key] = (values, nbytes)
+            SchemaInference.__cache_bytes += nbytes
+            while SchemaInference.__cache_bytes > self.max_cached_bytes:
+                _, (_, evicted_bytes) = SchemaInference.__cache.popitem(last=False)
+                SchemaInference.__cache_bytes -= evicted_bytes
@@ -0,0 +1,269 @@
+import numpy as np
+import pandas as pd
+
+
+class QuantileSketch:
+    """
+    A class to estimate quantiles per group with a mergeable, DDSketch-style sketch.
+
+    Values are counted in logarithmic buckets whose bounds grow by a factor of
+    gamma = (1 + relative_error) / (1 - relative_error), and every bucket is read back as
+    the value with the lowest relative error to its bounds. A quantile q of a group is
+    therefore within relative_error of the exact value at rank q * (count - 1), e.g.
+    within 1% of the median by default (for an even count, of the lower of the two
+    middle values). Values closer to zero than min_value are counted as zero.
+
+    The sketch of every group is a count per bucket: two sketches merge by adding their
+    counts, so chunks and worker processes can be sketched apart and combined, and
+    the memory only grows with the log of the range of the values.
+    """
+
+    __bucket_offset = 2**20  # Keeps positive and negative bucket codes apart
+    __bucket_level = "__bucket__"
+
+    def __init__(self, relative_error=0.01, min_value=1e-9):
+        if not 0 < relative_error < 1:
+            raise ValueError("relative_error must be between 0 and 1.")
+        self.relative_error = relative_error
+        self.min_value = min_value
+        self.gamma = (1 + relative_error) / (1 - relative_error)
+        self.counts = None  # Count per (*group keys, bucket code), sorted
+
+    def __bucket_codes(self, values):
+        """
+        Returns the bucket of every value as a code that sorts like the values:
+        negative codes for negative values, 0 for zero and positive ones above.
+        """
+        values = np.where(np.isfinite(values), values, 0.0)  # Ignored by update
+        magnitudes = np.abs(values)
+        is_zero = magnitudes < self.min_value
+        buckets = np.ceil(
+            np.log(np.where(is_zero, 1.0, magnitudes)) / np.log(self.gamma)
+        ).astype(np.int64)
+
+        return np.where(
+            is_zero,
+            0,
+            np.sign(values).astype(np.int64) * (buckets + self.__bucket_offset),
+        )
+
+    def __bucket_values(self, codes):
+        buckets = np.abs(codes) - self.__bucket_offset
+        values = 2 * self.gamma ** buckets.astype(np.float64) / (self.gamma + 1)
+
+        return np.where(codes == 0, 0.0, np.sign(codes) * values)
+
+    def __merge_counts(self, counts):
+        counts = [count for count in counts if count is not None]
+        if not counts:
+            return None
+        if len(counts) == 1:
+            return counts[0].sort_index()
+
+        merged = pd.concat(counts)
+        return merged.groupby(level=list(range(merged.index.nlevels)), sort=True).sum()
+
+    def update(self, keys, values):
+        """
+        Adds the values of a chunk to the sketch. keys is a list of Series aligned with
+        values, holding the group of every row. Rows with a null key or a null or
+        infinite value are ignored.
+        """
+        array = pd.to_numeric(values).to_numpy(dtype=np.float64, na_value=np.nan)
+        not_null = np.isfinite(array)
+        codes = pd.Series(
+            self.__bucket_codes(array), index=values.index, name=self.__bucket_level
+        )
+
+        counts = (
+            codes[not_null]
+            .groupby(
+                [key[not_null] for key in keys] + [codes[not_null]],
+                sort=False,
+                observed=True,
+                dropna=True,
+            )
+            .size()
+        )
+        self.counts = self.__merge_counts([self.counts, counts])
+
+        return self
+
+    def merge(self, other):
+        """
+        Returns a new sketch with the counts of both sketches.
+        """
+        if other.relative_error != self.relative_error:
+            raise ValueError("Only sketches with the same relative_error can merge.")
+
+        merged = QuantileSketch(self.relative_error, self.min_value)
+        merged.counts = self.__merge_counts([self.counts, other.counts])
+
+        return merged
+
+    def quantile(self, q):
+        """
+        Returns the estimated quantile q (between 0 and 1) of every group.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1.")
+        if self.counts is None:
+            return pd.Series(dtype=np.float64)
+
+        group_levels = list(range(self.counts.index.nlevels - 1))
+        grouped = self.counts.groupby(level=group_levels, sort=False)
+        ranks = q * (grouped.transform("sum") - 1)
+        reached = self.counts[grouped.cumsum() > ranks]
+        first = reached.groupby(level=group_levels, sort=False).head(1)
+
+        codes = first.index.get_level_values(-1).to_numpy()
+        quantiles = pd.Series(
+            self.__bucket_values(codes), index=first.index.droplevel(-1)
+        )
+
+        return quantiles
+
+
+class DistinctCountSketch:
+    """
+    A class to estimate the number of distinct values per group with a mergeable
+    HyperLogLog sketch.
+
+    Every value is hashed to 64 bits: the first precision bits pick one of
+    2**precision registers, and the register keeps the highest rank (leading zeros + 1)
+    of the remaining bits. The relative standard error of the estimate is about
+    1.04 / sqrt(2**precision), 0.8% with the default precision of 14, whatever the
+    number of distinct values. Two sketches merge by keeping the highest rank of every
+    register, so chunks and worker processes can be sketched apart and combined.
+
+    The registers of every group are a dense row of 2**precision bytes (16 KiB by
+    default) updated in one vectorized pass, so a lower precision suits pivots with
+    many thousands of groups. Hashing strings costs about as much as counting them
+    exactly, so on a DataFrame held in memory the sketch only beats nunique on
+    numeric values: it is meant for chunks, whose exact counts cannot be merged.
+    """
+
+    __estimate_block = 256  # Groups estimated at once, to bound the temporary memory
+
+    def __init__(self, precision=14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18.")
+        self.precision = precision
+        self.n_registers = 2**precision
+        self.groups = None  # Index of the group keys, one per row of registers
+        self.registers = None  # Highest rank per group and register, 0 when empty
+
+    def __leading_zeros(self, hashes):
+        """
+        Returns the number of leading zero bits of every 64-bit hash.
+        """
+        leading_zeros = np.zeros(len(hashes), dtype=np.int64)
+        for shift in [32, 16, 8, 4, 2, 1]:
+            is_short = hashes < np.uint64(1) << np.uint64(64 - shift)
+            leading_zeros += np.where(is_short, shift, 0)
+            hashes = np.where(is_short, hashes << np.uint64(shift), hashes)
+
+        return leading_zeros + (hashes == 0)
+
+    def __add_groups(self, groups):
+        """
+        Appends the groups not seen yet, with empty registers, and returns the row of
+        registers of every group.
+        """
+        if self.groups is None:
+            self.groups = groups
+            self.registers = np.zeros((len(groups), self.n_registers), dtype=np.uint8)
+            return np.arange(len(groups))
+
+        positions = self.groups.get_indexer(groups)
+        new_groups = groups[positions < 0]
+        if len(new_groups) > 0:
+            self.groups = self.groups.append(new_groups)
+            self.registers = np.vstack(
+                [
+                    self.registers,
+                    np.zeros((len(new_groups), self.n_registers), dtype=np.uint8),
+                ]
+            )
+            positions = self.groups.get_indexer(groups)
+
+        return positions
+
+    def update(self, keys, values):
+        """
+        Adds the values of a chunk to the sketch. keys is a list of Series aligned with
+        values, holding the group of every row. Rows with a null key or value are
+        ignored.
+        """
+        not_null = values.notna().to_numpy()
+        if not not_null.all():
+            values, keys = values[not_null], [key[not_null] for key in keys]
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+        registers = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        remaining_bits = hashes << np.uint64(self.precision)
+        ranks = np.minimum(
+            self.__leading_zeros(remaining_bits) + 1, 64 - self.precision + 1
+        ).astype(np.uint8)
+
+        grouped = pd.Series(ranks).groupby(
+            [key.to_numpy() for key in keys], sort=False, observed=True, dropna=True
+        )
+        codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)  # Null keys
+        groups = grouped.size().index.set_names([key.name for key in keys])
+        rows = self.__add_groups(groups)[codes]
+        has_key = codes >= 0
+
+        np.maximum.at(
+            self.registers.reshape(-1),
+            rows[has_key] * self.n_registers + registers[has_key],
+            ranks[has_key],
+        )  # Flat positions are much faster than (row, register) pairs
+
+        return self
+
+    def merge(self, other):
+        """
+        Returns a new sketch with the registers of both sketches.
+        """
+        if other.precision != self.precision:
+            raise ValueError("Only sketches with the same precision can merge.")
+
+        merged = DistinctCountSketch(self.precision)
+        for sketch in [self, other]:
+            if sketch.groups is None:
+                continue
+            rows = merged.__add_groups(sketch.groups)
+            merged.registers[rows] = np.maximum(
+                merged.registers[rows], sketch.registers
+            )
+
+        return merged
+
+    def estimate(self):
+        """
+        Returns the estimated number of distinct values of every group.
+        """
+        if self.groups is None:
+            return pd.Series(dtype=np.float64)
+
+        m = self.n_registers
+        alpha = 0.7213 / (1 + 1.079 / m)
+        powers = 2.0 ** -np.arange(65, dtype=np.float64)  # 2 ** -rank, by rank
+
+        sums = np.empty(len(self.groups))
+        empty_registers = np.empty(len(self.groups))
+        for start in range(0, len(self.groups), self.__estimate_block):
+            block = self.registers[start : start + self.__estimate_block]
+            sums[start : start + len(block)] = powers[block].sum(axis=1)
+            empty_registers[start : start + len(block)] = (block == 0).sum(axis=1)
+        estimates = alpha * m**2 / sums
+
+        small = (estimates <= 2.5 * m) & (empty_registers > 0)
+        with np.errstate(divide="ignore"):
+            linear_counting = m * np.log(m / empty_registers)
+        estimates = np.where(
+            small, linear_counting, estimates
+        )  # Small-range correction
+
+        return pd.Series(estimates, index=self.groups).round()
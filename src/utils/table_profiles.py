@@ -0,0 +1,61 @@
+import json
+import os
+import re
+import time
+
+import pandas as pd
+
+from .file_lock import temporary_path
+
+
+class TableProfileCache:
+    """
+    A class to cache table profiles on disk, shared by every project on the machine.
+    """
+
+    def __init__(self, cache_path, ttl=7 * 24 * 60 * 60):
+        self.cache_path = cache_path
+        self.ttl = ttl  # Default time to live of a profile, in seconds
+
+        if not os.path.exists(self.cache_path):
+            os.makedirs(self.cache_path)
+
+    def __profile_path(self, engine, table_name):
+        file_name = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{engine}__{table_name}")
+        return os.path.join(self.cache_path, f"{file_name}.json")
+
+    def get(self, engine, table_name, ttl=None):
+        """
+        Returns the cached profile of a table, or None if it is missing or expired.
+        """
+        profile_path = self.__profile_path(engine, table_name)
+        if not os.path.exists(profile_path):
+            return None
+
+        with open(profile_path, "r") as f:
+            profile = json.load(f)
+
+        ttl = self.ttl if ttl is None else ttl
+        if time.time() > profile["fetched_at"] + ttl:
+            return None
+
+        profile["schema"] = pd.DataFrame(profile["schema"])
+        profile["column_stats"] = pd.DataFrame(profile["column_stats"])
+
+        return profile
+
+    def put(self, engine, table_name, profile):
+        """
+        Stores the profile of a table.
+        """
+        serialized = {
+            **profile,
+            "schema": profile["schema"].to_dict(orient="records"),
+            "column_stats": profile["column_stats"].to_dict(orient="records"),
+        }
+
+        profile_path = self.__profile_path(engine, table_name)
+        temporary_file = temporary_path(profile_path)
+        with open(temporary_file, "w") as f:
+            json.dump(serialized, f, indent=2, default=str)
+        os.replace(temporary_file, profile_path)  # Readers never see a partial file
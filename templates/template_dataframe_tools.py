@@ -7,11 +7,22 @@ pivot_params = {
     "index": [1],
     "columns": [2],
     "values": [4],
+    # sum, mean, median, min, max, count, nunique, approx_nunique, p90, weighted_mean, ratio
     "aggfuncs": ["sum"],
+    "weights": None,  # [5], for weighted_mean
+    "denominator": None,  # [6], for ratio
 }
 
 p = dataframe_tools.Pivot(df, pivot_params).run_pivot()
 
+# Memoize pivots of unchanged data across cell re-runs, or keep them on disk with
+# cache=dataframe_tools.PivotCache(cache_path="pivot_cache")
+p = dataframe_tools.Pivot(df, pivot_params, cache=True).run_pivot()
+
+# Pivot results that do not fit in memory, one chunk at a time
+chunks = q.iter_query_starburst(QUERY_NAME, params=params, chunk_size=1_000_000)
+p = dataframe_tools.Pivot(chunks, pivot_params).run_pivot()
+
 ## =====================================
 ## Plotter
 ## =====================================
@@ -42,6 +53,8 @@ plot_params = [
         "colors": ["b", "o"],  # ['o','g','r','pu','br','pi','gr','ol','cy']
         "styles": ["-", "-"],  # ['--'. '-', ':']
         "legend": True,
+        "downsample": "auto",  # ['auto', 'minmax', 'lttb', None]
+        "downsample_threshold": 100_000,  # Points above which 'auto' downsamples
     },
 ]
 
@@ -56,6 +69,19 @@ plot_params = [
     },
 ]
 
+# Density Scatterplot, for millions of points
+plot_params = [
+    {
+        "plot_type": "density_scatterplot",
+        "x_column": [1],
+        "y_columns": [2, 3],
+        "colors": ["b", "o"],  # ['o','g','r','pu','br','pi','gr','ol','cy']
+        "legend": True,
+        "grid_size": 300,  # Cells per axis
+        "log_scale": False,
+    },
+]
+
 # Histogram
 plot_params = [
     {
@@ -8,12 +8,60 @@ END_DATE = "'2026-01-01'"
 
 params = {"start_date": str(START_DATE), "end_date": str(END_DATE)}
 
-df = q.run_query_starburst(  # or run_table_explorer_bigquery
-    QUERY_NAME, params=params, csv_file=QUERY_NAME, load_csv_file=False
+df = q.run_query_starburst(  # or run_query_bigquery, run_query_livedb
+    QUERY_NAME,
+    params=params,
+    csv_file=QUERY_NAME,
+    load_csv_file=False,
+    columns=None,  # ['col_a', 'col_b'] to read only a subset of columns
+    export_csv=False,  # True to also save the output as CSV
+    use_cache=True,  # False to skip the result cache
+    refresh_cache=False,  # True to re-run the query and overwrite the cache
+    partition_by=None,  # 'day', 'week' or 'month' to run the date range in windows
+    incremental=False,  # True to only fetch the windows not materialized yet
+    lookback_days=0,  # Days before end_date to re-fetch for late-arriving data
+    sample=None,  # 0.01 to run on a 1% sample of the base tables while iterating
+    compact_dtypes=None,  # True/False to force, by default only for large results
 )
 
 df.head()
 
+## =====================================
+## Estimate Query
+## =====================================
+
+q.estimate_query_starburst(QUERY_NAME, params=params)[  # or estimate_query_bigquery
+    "bytes_estimate"
+]
+
+## =====================================
+## Query in parallel
+## =====================================
+
+jobs = [
+    ("starburst", "XXX.sql", params),
+    ("bigquery", "YYY.sql", params),
+]
+
+dfs = {}
+for result in q.run_queries(jobs, max_workers=4):
+    if result["error"] is not None:
+        print(result["job"], result["error"])
+    else:
+        dfs[result["job"][1]] = result["df"]
+
+## =====================================
+## Query in chunks
+## =====================================
+
+for chunk in q.iter_query_starburst(  # or iter_query_bigquery
+    QUERY_NAME,
+    params=params,
+    chunk_size=100_000,
+    spill_file=QUERY_NAME,  # Replaces the output of run_query_* with the same name
+):
+    chunk.head()
+
 ## =====================================
 ## Explore Table
 ## =====================================
@@ -21,3 +69,28 @@ df.head()
 TABLE = "delta.central_order_descriptors_odp.order_descriptors_v2"
 
 df = q.run_table_explorer_starburst(TABLE)  # or run_table_explorer_bigquery
+
+## =====================================
+## Query Report
+## =====================================
+
+q.query_report(n=10, sort_by="total_seconds")  # or sort_by="bytes_processed"
+
+## =====================================
+## Profile Table
+## =====================================
+
+profile = q.run_table_profile_starburst(TABLE)  # or run_table_profile_bigquery
+
+profile["partition_columns"], profile["row_count"]
+profile["column_stats"]
+
+## =====================================
+## Query Saved Outputs Locally
+## =====================================
+
+# Saved outputs are tables named after their csv_file: XXX.sql -> XXX
+df = q.run_query_local("local_XXX.sql", params=params)
+
+# QueryEngines(backend="local") serves run_query_* from fixtures/, e.g.
+# fixtures/delta.schema.table.parquet, to run notebooks offline